@@ -0,0 +1,47 @@
+"""
+Gunicorn settings for the News Agent backend
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+
+# Threaded workers let one process serve many requests while their news API
+# calls are in flight on the shared event loop
+worker_class = 'gthread'
+threads = 8
+timeout = 120
+
+# Bind with SO_REUSEPORT so a new master can take over the port during a
+# restart without refused connections
+reuse_port = True
+
+
+def pre_fork(server, worker):
+    """
+    Pick a core no live worker holds for the new worker, when there are
+    enough to go around
+
+    Runs in the master, which tracks the workers, so a respawned worker takes
+    over the core its predecessor freed.
+    """
+    worker.cpu = None
+    if not hasattr(os, 'sched_setaffinity'):
+        return
+
+    cpus = sorted(os.sched_getaffinity(0))
+    if server.cfg.workers > len(cpus):
+        return
+
+    taken = {getattr(sibling, 'cpu', None) for sibling in server.WORKERS.values()}
+    worker.cpu = next((cpu for cpu in cpus if cpu not in taken), None)
+
+
+def post_fork(server, worker):
+    """Pin the worker to the core chosen for it in pre_fork"""
+    if worker.cpu is None:
+        return
+
+    os.sched_setaffinity(0, {worker.cpu})
+    server.log.info(f"Pinned worker {worker.pid} to CPU {worker.cpu}")
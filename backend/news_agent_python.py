@@ -6,16 +6,35 @@ A conversational AI that fetches news and discusses current events
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import os
-import requests
-import json
 import time
+import atexit
+import asyncio
 import logging
+import threading
+import weakref
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Union
+from functools import partial
+from operator import itemgetter
+from itertools import chain, islice, zip_longest
+from typing import Dict, List, Any, Optional, Union, Callable, Awaitable, Iterator
+import re
+import aiohttp
+import ahocorasick
 import openai
+import orjson
+import redis.asyncio as redis
+from cachetools import LRUCache, TLRUCache, TTLCache
 from dotenv import load_dotenv
 import secrets
 
+from orjson_provider import OrjsonProvider
+
+try:
+    import hyperscan
+except ImportError:  # Optional; intent detection falls back to the automaton
+    hyperscan = None
+
 # Load environment variables
 load_dotenv()
 
@@ -28,10 +47,11 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
-secret_key = os.getenv('FLASK_SECRET_KEY')
+app.json = OrjsonProvider(app)
+secret_key = os.getenv('FLASK_SECRET_KEY') or os.getenv('SECRET_KEY')
 if not secret_key:
     secret_key = secrets.token_hex(32)
-    print('WARNING: FLASK_SECRET_KEY not set in .env, using a random secret key for this session.')
+    logger.warning("Neither FLASK_SECRET_KEY nor SECRET_KEY is set, using a random secret key for this session.")
 app.secret_key = secret_key
 CORS(app)  # Enable CORS for all routes
 
@@ -41,13 +61,282 @@ NYT_API_KEY = os.getenv('NYT_API_KEY', 'ol1fhGLHJtvD007tp7cGduT5JuKdf9bz')
 GUARDIAN_API_KEY = os.getenv('GUARDIAN_API_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
+# Redis connection for the shared news cache (optional)
+REDIS_URL = os.getenv('REDIS_URL')
+
 # Configure OpenAI if key is available
-if OPENAI_API_KEY:
-    openai.api_key = OPENAI_API_KEY
+openai_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+
+# Share cached news across workers when Redis is configured
+redis_client = redis.Redis.from_url(REDIS_URL) if REDIS_URL else None
+
+# Event loop shared by every request thread so that outbound calls run
+# concurrently over one connection pool
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+# HTTP session reused across all news API calls
+_http_session: Optional[aiohttp.ClientSession] = None
+
+# Bound every news API call so a stalled upstream can't hang a request
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3)
+
+# Transient upstream statuses worth retrying, and how often
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.2
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the shared event loop, starting its thread on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='news-agent-io', daemon=True).start()
+    return _loop
+
+
+def run_async(coro):
+    """
+    Run a coroutine on the shared event loop and wait for the result
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+
+async def run_on_loop(coro):
+    """
+    Await a coroutine that runs on the shared event loop
+    
+    Async views run on a per-request loop, while the HTTP session and API
+    clients are bound to the shared loop, so their work is handed over to it.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, get_event_loop()))
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Get the shared HTTP session, creating it on the running loop if needed"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        # Bound concurrency to stay within the news APIs' rate limits, and keep
+        # idle connections and DNS answers around so bursts of calls to the
+        # same few hosts reuse them instead of paying for new TLS handshakes
+        connector = aiohttp.TCPConnector(
+            limit=32,
+            limit_per_host=8,
+            keepalive_timeout=60,
+            ttl_dns_cache=300
+        )
+        _http_session = aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT)
+    return _http_session
+
+
+async def close_clients():
+    """Close the shared HTTP session, OpenAI client and Redis connection"""
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    if openai_client is not None:
+        await openai_client.close()
+    if redis_client is not None:
+        await redis_client.aclose()
+
+
+@atexit.register
+def _shutdown():
+    if _loop is not None:
+        run_async(close_clients())
+
+
+def _dig(item: Dict, path: tuple) -> Any:
+    """Follow a path of keys into nested dicts"""
+    for key in path:
+        if not isinstance(item, dict):
+            return None
+        item = item.get(key)
+    return item
+
+
+def _path_getter(path: tuple) -> Callable[[Dict], Any]:
+    """Make a getter that follows a path of keys into nested dicts"""
+    return lambda item: _dig(item, path)
+
+
+def _compile_fields(field_map: Dict) -> Callable[[Dict], Dict]:
+    """
+    Compile a field map into a function that builds one article, fetching
+    every top-level field with a single itemgetter call
+    
+    Args:
+        field_map: Output field to source path mapping
+        
+    Returns:
+        Function from an API item to an article dict
+    """
+    flat_fields = []
+    flat_keys = []
+    others = []
+    for field, path in field_map.items():
+        if callable(path):
+            others.append((field, path))
+        elif len(path) == 1:
+            flat_fields.append(field)
+            flat_keys.append(path[0])
+        else:
+            others.append((field, _path_getter(path)))
+    
+    flat_fields = tuple(flat_fields)
+    if not flat_keys:
+        get_flat = lambda item: ()
+    elif len(flat_keys) == 1:
+        # A single-key itemgetter returns the bare value rather than a tuple
+        get_flat = lambda item, get=itemgetter(*flat_keys): (get(item),)
+    else:
+        get_flat = itemgetter(*flat_keys)
+    
+    # Copying a dict with every field already in place keeps the fields in
+    # the field map's order, however they're filled in
+    template = dict.fromkeys(field_map)
+    
+    def build(item: Dict) -> Dict:
+        article = template.copy()
+        try:
+            article.update(zip(flat_fields, get_flat(item)))
+        except KeyError:
+            # Some items omit fields, so look them up one by one
+            article.update((field, item.get(key)) for field, key in zip(flat_fields, flat_keys))
+        for field, get in others:
+            article[field] = get(item)
+        return article
+    
+    return build
+
+
+# Article fields for each news API response format. Each output field maps to a
+# path of keys into the source item, or to a function of the item.
+NEWSAPI_FIELDS = _compile_fields({
+    'title': ('title',),
+    'description': ('description',),
+    'url': ('url',),
+    'imageUrl': ('urlToImage',),
+    'source': ('source', 'name'),
+    'publishedAt': ('publishedAt',),
+    'content': ('content',)
+})
+
+NYT_TOP_STORIES_FIELDS = _compile_fields({
+    'title': ('title',),
+    'description': ('abstract',),
+    'url': ('url',),
+    'imageUrl': lambda article: NewsAgentAPI._get_nyt_image_url(article),
+    'source': lambda article: 'The New York Times',
+    'publishedAt': ('published_date',),
+    'section': ('section',)
+})
+
+NYT_SEARCH_FIELDS = _compile_fields({
+    'title': ('headline', 'main'),
+    'description': lambda doc: doc.get('abstract') or doc.get('snippet'),
+    'url': ('web_url',),
+    'imageUrl': lambda doc: NewsAgentAPI._get_nyt_search_image_url(doc),
+    'source': lambda doc: 'The New York Times',
+    'publishedAt': ('pub_date',),
+    'section': ('section_name',)
+})
+
+GUARDIAN_FIELDS = _compile_fields({
+    'title': ('webTitle',),
+    'description': ('fields', 'trailText'),
+    'url': ('webUrl',),
+    'imageUrl': ('fields', 'thumbnail'),
+    'source': lambda article: 'The Guardian',
+    'publishedAt': ('webPublicationDate',),
+    'section': ('sectionName',)
+})
+
+
+def _project(items: List[Dict], fields: Callable[[Dict], Dict], limit: Optional[int] = None) -> List[Dict]:
+    """
+    Reshape API items into article dicts
+    
+    Args:
+        items: Items from a news API response
+        fields: Compiled field map from _compile_fields
+        limit: Maximum number of articles to build, the rest are skipped
+        
+    Returns:
+        List of articles
+    """
+    return [fields(item) for item in islice(items, limit)]
+
+
+# Anything that isn't a letter or digit, ignored when comparing titles
+TITLE_NOISE_PATTERN = re.compile(r'[\W_]+')
+
+
+def _unique_by_title(articles: List[Dict]) -> Iterator[Dict]:
+    """
+    Yield articles, skipping any whose title repeats an earlier one
+    
+    Titles are compared ignoring case, punctuation and spacing so the same
+    story syndicated by several sources only counts once.
+    
+    Args:
+        articles: List of articles
+        
+    Yields:
+        Articles with distinct titles
+    """
+    seen = set()
+    for article in articles:
+        key = TITLE_NOISE_PATTERN.sub('', (article.get('title') or '').lower())
+        if key and key in seen:
+            continue
+        seen.add(key)
+        yield article
+
 
-# Secret key for session management
-SECRET_KEY = os.getenv('SECRET_KEY', os.urandom(24).hex())
-app.secret_key = SECRET_KEY
+# Publication names to NewsAPI source IDs
+PUBLICATION_SOURCES = {
+    'wall street journal': 'the-wall-street-journal',
+    'wsj': 'the-wall-street-journal',
+    'new york times': 'the-new-york-times',
+    'nyt': 'the-new-york-times',
+    'washington post': 'the-washington-post',
+    'cnn': 'cnn',
+    'bbc': 'bbc-news',
+    'bbc news': 'bbc-news',
+    'fox news': 'fox-news',
+    'nbc news': 'nbc-news',
+    'abc news': 'abc-news',
+    'reuters': 'reuters',
+    'associated press': 'associated-press',
+    'ap': 'associated-press'
+}
+
+# General news categories to NYT section names
+NYT_SECTIONS = {
+    'business': 'business',
+    'technology': 'technology',
+    'politics': 'politics',
+    'science': 'science',
+    'health': 'health',
+    'sports': 'sports',
+    'arts': 'arts',
+    'world': 'world',
+    'us': 'us'
+}
 
 
 class NewsAgentAPI:
@@ -60,91 +349,353 @@ class NewsAgentAPI:
         self.nyt_api_key = NYT_API_KEY
         self.guardian_api_key = GUARDIAN_API_KEY
         
-        # Cache for storing recent news results
-        self.cache = {
-            'headlines': {},
-            'topics': {},
-            'publications': {}
+        # Cache durations in seconds for each kind of data. Breaking news goes
+        # stale within seconds while section listings and searches change slowly.
+        self.cache_ttl = {
+            'breaking': 30,
+            'headlines': 5 * 60,
+            'publications': 5 * 60,
+            'topics': 10 * 60
         }
         
-        # Cache duration in seconds (30 minutes)
-        self.cache_duration = 30 * 60
+        # Entries are refreshed in the background once this fraction of their
+        # TTL has passed, so callers don't wait for a refetch when they expire
+        self.refresh_ratio = 0.8
+        
+        # In-process cache for recent news results
+        self.local_cache = TLRUCache(maxsize=128, ttu=self._local_cache_expiry)
+        
+        # How long a worker may hold the lock for refreshing a cache key
+        self.cache_lock_timeout = 5
+        
+        # Fetches currently running, by cache key
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
+        # Background refreshes currently running, by cache key
+        self._refreshing: Dict[str, asyncio.Task] = {}
+    
+    @staticmethod
+    def _local_cache_expiry(key: str, entry: Dict, now: float) -> float:
+        """Expiry time for a local cache entry"""
+        remaining = entry['timestamp'] + entry['ttl'] - time.time()
+        # With Redis behind it, the local cache only holds hot keys briefly to
+        # skip the Redis round trip
+        if redis_client is not None:
+            remaining = min(remaining, 60)
+        return now + remaining
+    
+    async def _cache_get(self, key: str) -> Optional[Dict]:
+        """
+        Get a cache entry, checking the local cache before Redis
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Entry with 'timestamp', 'ttl' and 'data', or None on a miss
+        """
+        if key in self.local_cache:
+            return self.local_cache[key]
+        
+        if redis_client is None:
+            return None
+        
+        try:
+            raw = await redis_client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Error reading {key} from Redis: {e}")
+            return None
+        
+        if raw is None:
+            return None
+        
+        entry = orjson.loads(raw)
+        self.local_cache[key] = entry
+        return entry
+    
+    async def _cache_set(self, key: str, data: List[Dict], ttl: int):
+        """
+        Store data in the local cache and Redis, releasing any refresh lock
+        
+        Args:
+            key: Cache key
+            data: Data to cache
+            ttl: Time to live in seconds
+        """
+        # Entries are shared with other processes through Redis, so they are
+        # stamped with wall-clock time; expiry itself is enforced by Redis and
+        # by the local cache's monotonic timer
+        entry = {'timestamp': time.time(), 'ttl': ttl, 'data': data}
+        self.local_cache[key] = entry
+        
+        if redis_client is None:
+            return
+        
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(key, orjson.dumps(entry), ex=ttl)
+                pipe.delete(f"{key}:lock")
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Error writing {key} to Redis: {e}")
+    
+    async def _acquire_refresh_lock(self, key: str) -> bool:
+        """
+        Take the short Redis lock that lets one worker refetch a key
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Whether this worker should refetch the key
+        """
+        if redis_client is None:
+            return True
+        
+        try:
+            return bool(await redis_client.set(f"{key}:lock", 1, nx=True, ex=self.cache_lock_timeout))
+        except redis.RedisError as e:
+            logger.warning(f"Error locking {key} in Redis: {e}")
+            return True
+    
+    async def _release_refresh_lock(self, key: str):
+        """
+        Release the refresh lock on a key without caching anything, so other
+        workers can try fetching it themselves
+        
+        Args:
+            key: Cache key
+        """
+        if redis_client is None:
+            return
+        
+        try:
+            await redis_client.delete(f"{key}:lock")
+        except redis.RedisError as e:
+            logger.warning(f"Error unlocking {key} in Redis: {e}")
+    
+    def _schedule_refresh(self, key: str, refresh: Callable[[], Awaitable[List[Dict]]]):
+        """
+        Refetch a cache entry in the background, unless another worker or
+        task is already doing so
+        
+        Args:
+            key: Cache key
+            refresh: Coroutine function that refetches and caches the data
+        """
+        if key in self._refreshing:
+            return
+        
+        async def run():
+            if await self._acquire_refresh_lock(key):
+                await refresh()
+        
+        task = asyncio.ensure_future(run())
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+    
+    async def _cache_lookup(self, key: str, refresh: Callable[[], Awaitable[List[Dict]]]) -> Optional[List[Dict]]:
+        """
+        Get cached data, making sure only one worker refetches a key
+        
+        Entries close to expiry are returned as they are while a refresh runs
+        in the background. On a miss the caller takes a short Redis lock on
+        the key and should fetch it. Workers that lose the race wait for the
+        winner to fill the cache instead of hitting the news APIs themselves.
+        
+        Args:
+            key: Cache key
+            refresh: Coroutine function that refetches and caches the data
+            
+        Returns:
+            Cached data, or None if the caller should fetch it
+        """
+        entry = await self._cache_get(key)
+        if entry is not None:
+            if time.time() - entry['timestamp'] >= entry['ttl'] * self.refresh_ratio:
+                self._schedule_refresh(key, refresh)
+            return entry['data']
+        
+        if await self._acquire_refresh_lock(key):
+            return None
+        
+        # Poll until the lock holder fills the cache or its lock expires
+        for _ in range(self.cache_lock_timeout * 10):
+            await asyncio.sleep(0.1)
+            entry = await self._cache_get(key)
+            if entry is not None:
+                return entry['data']
+        
+        return None
+    
+    async def _coalesce(self, key: str, load: Callable[[], Awaitable[List[Dict]]]) -> List[Dict]:
+        """
+        Run a load for a cache key, sharing it with concurrent callers
+        
+        Callers asking for a key that is already being loaded wait for that
+        load instead of starting their own, so a burst of identical requests
+        reaches the news APIs once.
+        
+        Args:
+            key: Cache key
+            load: Coroutine function that loads the data
+            
+        Returns:
+            Loaded data
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Shield the shared load from callers that give up waiting
+        return await asyncio.shield(task)
+    
+    async def _get_json(self, url: str, params: Dict) -> Dict:
+        """
+        Send a GET request over the shared session and decode the JSON body
+        
+        Connection failures, timeouts, and rate-limited and gateway errors are
+        retried with exponential backoff.
+        
+        Args:
+            url: Endpoint URL
+            params: Query parameters
+            
+        Returns:
+            Decoded response body
+        """
+        session = await get_http_session()
+        for attempt in range(MAX_RETRIES + 1):
+            can_retry = attempt < MAX_RETRIES
+            try:
+                async with session.get(url, params=params) as response:
+                    if not (can_retry and response.status in RETRY_STATUSES):
+                        response.raise_for_status()
+                        return orjson.loads(await response.read())
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not can_retry:
+                    raise
+            
+            # Back off only once the response has given its connection back
+            # to the pool
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
     
-    def get_top_headlines(self, country: str = 'us', category: str = '') -> List[Dict]:
+    async def _gather_sources(self, sources: List[Awaitable[List[Dict]]],
+                              limit: Optional[int] = None) -> List[Dict]:
+        """
+        Fetch from several news sources concurrently and merge the results
+        
+        A source that fails is logged and skipped, so a slow or broken API
+        doesn't hold up or sink the others.
+        
+        Args:
+            sources: Pending fetches, one per source
+            limit: Maximum number of articles to return
+            
+        Returns:
+            Articles from all sources, interleaved so the first ones cover
+            every source
+        """
+        results = []
+        for result in await asyncio.gather(*sources, return_exceptions=True):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching from a news source: {result}")
+            else:
+                results.append(result)
+        
+        interleaved = chain.from_iterable(zip_longest(*results))
+        return list(islice(filter(None, interleaved), limit))
+    
+    async def get_top_headlines(self, country: str = 'us', category: str = '', limit: Optional[int] = None) -> List[Dict]:
         """
         Get top headlines from multiple sources
         
         Args:
             country: Country code (e.g., 'us', 'gb')
             category: News category (e.g., 'business', 'technology')
+            limit: Maximum number of articles to return
             
         Returns:
             List of headline articles
         """
-        now = time.time()
+        cache_key = f"v1:news:headlines:{country}:{category or 'all'}:{limit or 'all'}"
+        return await self._coalesce(
+            cache_key,
+            partial(self._load_top_headlines, cache_key, country, category, limit)
+        )
+    
+    async def _fetch_newsapi_headlines(self, country: str, category: str,
+                                       limit: Optional[int] = None) -> List[Dict]:
+        """
+        Fetch top headlines from NewsAPI
+        
+        Args:
+            country: Country code
+            category: News category, or '' for all
+            limit: Maximum number of articles to return
+            
+        Returns:
+            List of headlines from NewsAPI
+        """
+        logger.info(f"Fetching headlines from NewsAPI for country={country}, category={category}")
+        params = {
+            'apiKey': self.news_api_key,
+            'country': country
+        }
+        
+        if category:
+            params['category'] = category
         
+        data = await self._get_json('https://newsapi.org/v2/top-headlines', params=params)
+        
+        # Transform the response data
+        return _project(data.get('articles', []), NEWSAPI_FIELDS, limit)
+    
+    async def _load_top_headlines(self, cache_key: str, country: str, category: str,
+                                  limit: Optional[int], use_cache: bool = True) -> List[Dict]:
+        """Get top headlines from the cache or the news APIs"""
         # Check cache first
-        cache_key = f"{country}-{category}"
-        if (cache_key in self.cache['headlines'] and 
-            now - self.cache['headlines'][cache_key]['timestamp'] < self.cache_duration):
-            return self.cache['headlines'][cache_key]['data']
+        if use_cache:
+            cached = await self._cache_lookup(
+                cache_key,
+                partial(self._load_top_headlines, cache_key, country, category, limit, use_cache=False)
+            )
+            if cached is not None:
+                return cached
         
         try:
-            headlines = []
-            
-            # Try NewsAPI first if key is available
+            # Query every configured source at once so a slow or failing one
+            # doesn't hold up the others
+            sources = []
             if self.news_api_key:
-                logger.info(f"Fetching headlines from NewsAPI for country={country}, category={category}")
-                news_api_url = 'https://newsapi.org/v2/top-headlines'
-                params = {
-                    'apiKey': self.news_api_key,
-                    'country': country
-                }
-                
-                if category:
-                    params['category'] = category
-                    
-                response = requests.get(news_api_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Transform the response data
-                headlines = [
-                    {
-                        'title': article.get('title'),
-                        'description': article.get('description'),
-                        'url': article.get('url'),
-                        'imageUrl': article.get('urlToImage'),
-                        'source': article.get('source', {}).get('name'),
-                        'publishedAt': article.get('publishedAt'),
-                        'content': article.get('content')
-                    }
-                    for article in data.get('articles', [])
-                ]
-            
-            # If no headlines from NewsAPI or no API key, try NYT Top Stories API
-            if not headlines and self.nyt_api_key:
-                logger.info(f"Fetching headlines from NYT Top Stories API for section={category or 'home'}")
+                sources.append(self._fetch_newsapi_headlines(country, category, limit))
+            if self.nyt_api_key:
                 # Map category to NYT section
                 nyt_section = self._map_category_to_nyt_section(category) if category else 'home'
-                headlines = self.fetch_from_nyt_top_stories(nyt_section)
-            
-            # If still no headlines, use Guardian API as final option
-            if not headlines and self.guardian_api_key:
+                logger.info(f"Fetching headlines from NYT Top Stories API for section={nyt_section}")
+                sources.append(self.fetch_from_nyt_top_stories(nyt_section, limit=limit))
+            if self.guardian_api_key:
                 logger.info(f"Fetching headlines from Guardian API")
-                headlines = self.fetch_from_guardian(category)
+                sources.append(self.fetch_from_guardian(category, limit=limit))
+            
+            headlines = await self._gather_sources(sources, limit)
             
-            # If all APIs fail, return mock data
+            # If all APIs fail, return mock data. It isn't cached, so it never
+            # replaces a real entry and the next request tries the APIs again.
             if not headlines:
                 logger.warning("No API keys available or all APIs failed, returning mock data")
-                headlines = [
+                await self._release_refresh_lock(cache_key)
+                now_iso = datetime.now().isoformat()
+                return [
                     {
                         'title': "Breaking News: Technology Advances",
                         'description': "Latest developments in AI and machine learning",
                         'url': "https://example.com/article1",
                         'imageUrl': None,
                         'source': "Tech News",
-                        'publishedAt': datetime.now().isoformat(),
+                        'publishedAt': now_iso,
                         'content': "This is mock content for technology news."
                     },
                     {
@@ -153,55 +704,68 @@ class NewsAgentAPI:
                         'url': "https://example.com/article2",
                         'imageUrl': None,
                         'source': "Financial Times",
-                        'publishedAt': datetime.now().isoformat(),
+                        'publishedAt': now_iso,
                         'content': "This is mock content for market news."
                     }
                 ]
             
             # Update cache
-            self.cache['headlines'][cache_key] = {
-                'timestamp': now,
-                'data': headlines
-            }
+            ttl = self.cache_ttl['headlines' if category else 'breaking']
+            await self._cache_set(cache_key, headlines, ttl)
             
             return headlines
         except Exception as e:
             logger.error(f"Error fetching top headlines: {e}")
-            # Fall back to mock data on error
+            # Fall back to mock data on error, letting other workers retry the key
+            await self._release_refresh_lock(cache_key)
+            now_iso = datetime.now().isoformat()
             return [
                 {
                     "title": "Breaking News: Technology Advances",
                     "description": "Latest developments in AI and machine learning",
                     "url": "https://example.com/article1",
                     "source": "Tech News",
-                    "publishedAt": datetime.now().isoformat()
+                    "publishedAt": now_iso
                 },
                 {
                     "title": "Global Markets Update",
                     "description": "Stock markets react to recent economic news",
                     "url": "https://example.com/article2",
                     "source": "Financial Times",
-                    "publishedAt": datetime.now().isoformat()
+                    "publishedAt": now_iso
                 }
             ]
     
-    def get_from_publication(self, publication: str) -> List[Dict]:
+    async def get_from_publication(self, publication: str, limit: Optional[int] = None) -> List[Dict]:
         """
         Get news from a specific publication
         
         Args:
             publication: Name of the publication
+            limit: Maximum number of articles to return
             
         Returns:
             List of articles from the publication
         """
-        now = time.time()
+        cache_key = f"v1:news:publications:{publication.lower()}:{limit or 'all'}"
+        return await self._coalesce(
+            cache_key,
+            partial(self._load_from_publication, cache_key, publication, limit)
+        )
+    
+    async def _load_from_publication(self, cache_key: str, publication: str,
+                                     limit: Optional[int], use_cache: bool = True) -> List[Dict]:
+        """Get news from a publication from the cache or the news APIs"""
         pub_lower = publication.lower()
         
         # Check cache first
-        if (pub_lower in self.cache['publications'] and 
-            now - self.cache['publications'][pub_lower]['timestamp'] < self.cache_duration):
-            return self.cache['publications'][pub_lower]['data']
+        if use_cache:
+            cached = await self._cache_lookup(
+                cache_key,
+                partial(self._load_from_publication, cache_key, publication, limit, use_cache=False)
+            )
+            if cached is not None:
+                return cached
         
         try:
             articles = []
@@ -209,25 +773,23 @@ class NewsAgentAPI:
             # Publication-specific API handling
             if pub_lower in ['new york times', 'nyt']:
                 logger.info("Fetching from NYT API")
-                articles = self.fetch_from_nyt()
+                articles = await self.fetch_from_nyt(limit=limit)
             elif pub_lower in ['the guardian', 'guardian']:
                 logger.info("Fetching from Guardian API")
-                articles = self.fetch_from_guardian()
+                articles = await self.fetch_from_guardian(limit=limit)
             else:
                 # Default to NewsAPI for other publications
                 logger.info(f"Searching news from {publication} using NewsAPI")
-                articles = self.search_news_by_source(publication)
+                articles = await self.search_news_by_source(publication, limit=limit)
             
             # Update cache
-            self.cache['publications'][pub_lower] = {
-                'timestamp': now,
-                'data': articles
-            }
+            await self._cache_set(cache_key, articles, self.cache_ttl['publications'])
             
             return articles
         except Exception as e:
             logger.error(f"Error fetching news from {publication}: {e}")
-            # Fall back to mock data on error
+            # Fall back to mock data on error, letting other workers retry the key
+            await self._release_refresh_lock(cache_key)
             return [
                 {
                     "title": f"Story from {publication}",
@@ -238,71 +800,80 @@ class NewsAgentAPI:
                 }
             ]
     
-    def get_news_by_topic(self, topic: str, language: str = 'en') -> List[Dict]:
+    async def get_news_by_topic(self, topic: str, language: str = 'en', limit: Optional[int] = None) -> List[Dict]:
         """
         Get news by topic
         
         Args:
             topic: Topic to search for
             language: Language code
+            limit: Maximum number of articles to return
             
         Returns:
             List of articles related to the topic
         """
-        now = time.time()
-        topic_lower = topic.lower()
+        cache_key = f"v1:news:topics:{topic.lower()}:{language}:{limit or 'all'}"
+        return await self._coalesce(
+            cache_key,
+            partial(self._load_news_by_topic, cache_key, topic, language, limit)
+        )
+    
+    async def _search_newsapi_topic(self, topic: str, language: str,
+                                    limit: Optional[int] = None) -> List[Dict]:
+        """
+        Search NewsAPI for articles on a topic
         
+        Args:
+            topic: Topic to search for
+            language: Language code
+            limit: Maximum number of articles to return
+            
+        Returns:
+            List of articles from NewsAPI
+        """
+        logger.info(f"Searching for topic '{topic}' using NewsAPI")
+        params = {
+            'apiKey': self.news_api_key,
+            'q': topic,
+            'language': language,
+            'sortBy': 'relevancy'
+        }
+        
+        data = await self._get_json('https://newsapi.org/v2/everything', params=params)
+        
+        return _project(data.get('articles', []), NEWSAPI_FIELDS, limit)
+    
+    async def _load_news_by_topic(self, cache_key: str, topic: str, language: str,
+                                  limit: Optional[int], use_cache: bool = True) -> List[Dict]:
+        """Get news by topic from the cache or the news APIs"""
         # Check cache first
-        if (topic_lower in self.cache['topics'] and 
-            now - self.cache['topics'][topic_lower]['timestamp'] < self.cache_duration):
-            return self.cache['topics'][topic_lower]['data']
+        if use_cache:
+            cached = await self._cache_lookup(
+                cache_key,
+                partial(self._load_news_by_topic, cache_key, topic, language, limit, use_cache=False)
+            )
+            if cached is not None:
+                return cached
         
         try:
-            articles = []
-            
-            # Try NewsAPI first
+            # Search every configured source at once
+            sources = []
             if self.news_api_key:
-                logger.info(f"Searching for topic '{topic}' using NewsAPI")
-                # NewsAPI request for topic search
-                news_api_url = 'https://newsapi.org/v2/everything'
-                params = {
-                    'apiKey': self.news_api_key,
-                    'q': topic,
-                    'language': language,
-                    'sortBy': 'relevancy'
-                }
-                
-                response = requests.get(news_api_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                articles = [
-                    {
-                        'title': article.get('title'),
-                        'description': article.get('description'),
-                        'url': article.get('url'),
-                        'imageUrl': article.get('urlToImage'),
-                        'source': article.get('source', {}).get('name'),
-                        'publishedAt': article.get('publishedAt'),
-                        'content': article.get('content')
-                    }
-                    for article in data.get('articles', [])
-                ]
-            
-            # NYT Article Search API as fallback
-            if not articles and self.nyt_api_key:
+                sources.append(self._search_newsapi_topic(topic, language, limit))
+            if self.nyt_api_key:
                 logger.info(f"Searching for topic '{topic}' using NYT Article Search API")
-                articles = self.search_nyt_articles(topic)
-            
-            # Guardian API as final option
-            if not articles and self.guardian_api_key:
+                sources.append(self.search_nyt_articles(topic, limit=limit))
+            if self.guardian_api_key:
                 logger.info(f"Searching for topic '{topic}' using Guardian API")
-                articles = self.search_guardian_articles(topic)
+                sources.append(self.search_guardian_articles(topic, limit=limit))
             
-            # If all APIs fail, return mock data
+            articles = await self._gather_sources(sources, limit)
+            
+            # If all APIs fail, return mock data without caching it
             if not articles:
                 logger.warning("No API keys available or all APIs failed, returning mock data")
-                articles = [
+                await self._release_refresh_lock(cache_key)
+                return [
                     {
                         "title": f"News about {topic}",
                         "description": f"Latest developments related to {topic}",
@@ -313,15 +884,13 @@ class NewsAgentAPI:
                 ]
             
             # Update cache
-            self.cache['topics'][topic_lower] = {
-                'timestamp': now,
-                'data': articles
-            }
+            await self._cache_set(cache_key, articles, self.cache_ttl['topics'])
             
             return articles
         except Exception as e:
             logger.error(f"Error fetching news about {topic}: {e}")
-            # Fall back to mock data on error
+            # Fall back to mock data on error, letting other workers retry the key
+            await self._release_refresh_lock(cache_key)
             return [
                 {
                     "title": f"News about {topic}",
@@ -332,12 +901,13 @@ class NewsAgentAPI:
                 }
             ]
     
-    def search_news_by_source(self, source: str) -> List[Dict]:
+    async def search_news_by_source(self, source: str, limit: Optional[int] = None) -> List[Dict]:
         """
         Search news by source
         
         Args:
             source: News source name
+            limit: Maximum number of articles to return
             
         Returns:
             List of articles from the source
@@ -350,22 +920,9 @@ class NewsAgentAPI:
                     'sources': self.map_publication_to_news_api_source(source)
                 }
                 
-                response = requests.get(news_api_url, params=params)
-                response.raise_for_status()
-                data = response.json()
+                data = await self._get_json(news_api_url, params=params)
                 
-                return [
-                    {
-                        'title': article.get('title'),
-                        'description': article.get('description'),
-                        'url': article.get('url'),
-                        'imageUrl': article.get('urlToImage'),
-                        'source': article.get('source', {}).get('name'),
-                        'publishedAt': article.get('publishedAt'),
-                        'content': article.get('content')
-                    }
-                    for article in data.get('articles', [])
-                ]
+                return _project(data.get('articles', []), NEWSAPI_FIELDS, limit)
             else:
                 logger.warning("NewsAPI key not available, cannot search by source")
                 return []
@@ -384,45 +941,21 @@ class NewsAgentAPI:
         Returns:
             NewsAPI source ID
         """
-        mapping = {
-            'wall street journal': 'the-wall-street-journal',
-            'wsj': 'the-wall-street-journal',
-            'new york times': 'the-new-york-times',
-            'nyt': 'the-new-york-times',
-            'washington post': 'the-washington-post',
-            'cnn': 'cnn',
-            'bbc': 'bbc-news',
-            'bbc news': 'bbc-news',
-            'fox news': 'fox-news',
-            'nbc news': 'nbc-news',
-            'abc news': 'abc-news',
-            'reuters': 'reuters',
-            'associated press': 'associated-press',
-            'ap': 'associated-press'
-        }
-        
         pub_lower = publication.lower()
-        return mapping.get(pub_lower, pub_lower)
+        return PUBLICATION_SOURCES.get(pub_lower, pub_lower)
     
-    def _map_category_to_nyt_section(self, category: str) -> str:
+    @staticmethod
+    def _map_category_to_nyt_section(category: str) -> str:
         """Map general news category to NYT section name"""
-        mapping = {
-            'business': 'business',
-            'technology': 'technology',
-            'politics': 'politics',
-            'science': 'science',
-            'health': 'health',
-            'sports': 'sports',
-            'arts': 'arts',
-            'world': 'world',
-            'us': 'us'
-        }
-        return mapping.get(category.lower(), 'home')
+        return NYT_SECTIONS.get(category.lower(), 'home')
     
-    def fetch_from_nyt(self) -> List[Dict]:
+    async def fetch_from_nyt(self, limit: Optional[int] = None) -> List[Dict]:
         """
         Fetch from NYT Top Stories API
         
+        Args:
+            limit: Maximum number of articles to return
+            
         Returns:
             List of articles from NYT
         """
@@ -436,32 +969,20 @@ class NewsAgentAPI:
                 'api-key': self.nyt_api_key
             }
             
-            response = requests.get(nyt_api_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(nyt_api_url, params=params)
             
-            return [
-                {
-                    'title': article.get('title'),
-                    'description': article.get('abstract'),
-                    'url': article.get('url'),
-                    'imageUrl': self._get_nyt_image_url(article),
-                    'source': 'The New York Times',
-                    'publishedAt': article.get('published_date'),
-                    'section': article.get('section')
-                }
-                for article in data.get('results', [])
-            ]
+            return _project(data.get('results', []), NYT_TOP_STORIES_FIELDS, limit)
         except Exception as e:
             logger.error(f"Error fetching from NYT API: {e}")
             raise Exception("Failed to fetch from The New York Times")
     
-    def fetch_from_nyt_top_stories(self, section: str = 'home') -> List[Dict]:
+    async def fetch_from_nyt_top_stories(self, section: str = 'home', limit: Optional[int] = None) -> List[Dict]:
         """
         Fetch from NYT Top Stories API for a specific section
         
         Args:
             section: NYT section name
+            limit: Maximum number of articles to return
             
         Returns:
             List of articles from the section
@@ -476,32 +997,20 @@ class NewsAgentAPI:
                 'api-key': self.nyt_api_key
             }
             
-            response = requests.get(nyt_api_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(nyt_api_url, params=params)
             
-            return [
-                {
-                    'title': article.get('title'),
-                    'description': article.get('abstract'),
-                    'url': article.get('url'),
-                    'imageUrl': self._get_nyt_image_url(article),
-                    'source': 'The New York Times',
-                    'publishedAt': article.get('published_date'),
-                    'section': article.get('section')
-                }
-                for article in data.get('results', [])
-            ]
+            return _project(data.get('results', []), NYT_TOP_STORIES_FIELDS, limit)
         except Exception as e:
             logger.error(f"Error fetching from NYT Top Stories API for section {section}: {e}")
             raise Exception(f"Failed to fetch from NYT section {section}")
     
-    def search_nyt_articles(self, query: str) -> List[Dict]:
+    async def search_nyt_articles(self, query: str, limit: Optional[int] = None) -> List[Dict]:
         """
         Search articles using NYT Article Search API
         
         Args:
             query: Search query
+            limit: Maximum number of articles to return
             
         Returns:
             List of matching articles
@@ -518,22 +1027,9 @@ class NewsAgentAPI:
                 'sort': 'newest'
             }
             
-            response = requests.get(nyt_api_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(nyt_api_url, params=params)
             
-            return [
-                {
-                    'title': doc.get('headline', {}).get('main'),
-                    'description': doc.get('abstract') or doc.get('snippet'),
-                    'url': doc.get('web_url'),
-                    'imageUrl': self._get_nyt_search_image_url(doc),
-                    'source': 'The New York Times',
-                    'publishedAt': doc.get('pub_date'),
-                    'section': doc.get('section_name')
-                }
-                for doc in data.get('response', {}).get('docs', [])
-            ]
+            return _project(data.get('response', {}).get('docs', []), NYT_SEARCH_FIELDS, limit)
         except Exception as e:
             logger.error(f"Error searching NYT articles: {e}")
             raise Exception("Failed to search NYT articles")
@@ -541,42 +1037,37 @@ class NewsAgentAPI:
     @staticmethod
     def _get_nyt_image_url(article: Dict) -> Optional[str]:
         """Extract image URL from NYT article data"""
-        if not article.get('multimedia'):
-            return None
-        
         # Find the largest image
-        largest_image = None
-        max_width = 0
+        largest_image = max(
+            article.get('multimedia') or (),
+            key=lambda image: image.get('width') or 0,
+            default=None
+        )
         
-        for image in article.get('multimedia', []):
-            width = image.get('width', 0)
-            if width > max_width:
-                max_width = width
-                largest_image = image
-        
-        if largest_image and 'url' in largest_image:
-            return largest_image['url']
+        if largest_image and (largest_image.get('width') or 0) > 0:
+            return largest_image.get('url')
         
         return None
     
     @staticmethod
     def _get_nyt_search_image_url(doc: Dict) -> Optional[str]:
         """Extract image URL from NYT article search results"""
-        if not doc.get('multimedia'):
-            return None
-        
-        for multimedia in doc.get('multimedia', []):
-            if multimedia.get('type') == 'image':
-                return f"https://static01.nyt.com/{multimedia.get('url')}"
-        
-        return None
+        return next(
+            (
+                f"https://static01.nyt.com/{multimedia.get('url')}"
+                for multimedia in doc.get('multimedia') or ()
+                if multimedia.get('type') == 'image'
+            ),
+            None
+        )
     
-    def fetch_from_guardian(self, section: str = '') -> List[Dict]:
+    async def fetch_from_guardian(self, section: str = '', limit: Optional[int] = None) -> List[Dict]:
         """
         Fetch from Guardian API
         
         Args:
             section: Section filter (optional)
+            limit: Maximum number of articles to return
             
         Returns:
             List of articles from The Guardian
@@ -596,32 +1087,20 @@ class NewsAgentAPI:
             if section:
                 params['section'] = section
             
-            response = requests.get(guardian_api_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(guardian_api_url, params=params)
             
-            return [
-                {
-                    'title': article.get('webTitle'),
-                    'description': article.get('fields', {}).get('trailText'),
-                    'url': article.get('webUrl'),
-                    'imageUrl': article.get('fields', {}).get('thumbnail'),
-                    'source': 'The Guardian',
-                    'publishedAt': article.get('webPublicationDate'),
-                    'section': article.get('sectionName')
-                }
-                for article in data.get('response', {}).get('results', [])
-            ]
+            return _project(data.get('response', {}).get('results', []), GUARDIAN_FIELDS, limit)
         except Exception as e:
             logger.error(f"Error fetching from Guardian API: {e}")
             raise Exception("Failed to fetch from The Guardian")
     
-    def search_guardian_articles(self, query: str) -> List[Dict]:
+    async def search_guardian_articles(self, query: str, limit: Optional[int] = None) -> List[Dict]:
         """
         Search articles using Guardian API
         
         Args:
             query: Search query
+            limit: Maximum number of articles to return
             
         Returns:
             List of matching articles
@@ -639,27 +1118,38 @@ class NewsAgentAPI:
                 'order-by': 'relevance'
             }
             
-            response = requests.get(guardian_api_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(guardian_api_url, params=params)
             
-            return [
-                {
-                    'title': article.get('webTitle'),
-                    'description': article.get('fields', {}).get('trailText'),
-                    'url': article.get('webUrl'),
-                    'imageUrl': article.get('fields', {}).get('thumbnail'),
-                    'source': 'The Guardian',
-                    'publishedAt': article.get('webPublicationDate'),
-                    'section': article.get('sectionName')
-                }
-                for article in data.get('response', {}).get('results', [])
-            ]
+            return _project(data.get('response', {}).get('results', []), GUARDIAN_FIELDS, limit)
         except Exception as e:
             logger.error(f"Error searching Guardian articles: {e}")
             raise Exception("Failed to search Guardian articles")
     
-    def generate_news_analysis(self, articles: List[Dict], prompt: str) -> str:
+    @staticmethod
+    def _build_articles_context(articles: List[Dict], max_articles: int = 5, max_description: int = 300) -> str:
+        """
+        Build the prompt context for an analysis from only the fields it uses
+        
+        Descriptions are cut to a fixed length so that clients sending full
+        article payloads can't inflate the prompt, and repeated stories are
+        dropped so they don't crowd out others.
+        
+        Args:
+            articles: List of articles to analyze
+            max_articles: Maximum number of articles to include
+            max_description: Maximum description length in characters
+            
+        Returns:
+            Prompt context
+        """
+        return ''.join(
+            f"TITLE: {article.get('title')}\n"
+            f"SOURCE: {article.get('source')}\n"
+            f"DESCRIPTION: {(article.get('description') or 'No description available')[:max_description]}\n\n"
+            for article in islice(_unique_by_title(articles), max_articles)
+        )
+    
+    async def generate_news_analysis(self, articles: List[Dict], prompt: str) -> str:
         """
         Generate summaries or analysis using OpenAI
         
@@ -675,14 +1165,10 @@ class NewsAgentAPI:
         
         try:
             # Create a context from the articles
-            articles_context = ""
-            for i, article in enumerate(articles[:5]):
-                articles_context += f"TITLE: {article.get('title')}\n"
-                articles_context += f"SOURCE: {article.get('source')}\n"
-                articles_context += f"DESCRIPTION: {article.get('description') or 'No description available'}\n\n"
+            articles_context = self._build_articles_context(articles)
             
             # Generate the completion
-            response = openai.completions.create(
+            response = await openai_client.completions.create(
                 model="gpt-3.5-turbo-instruct",
                 prompt=f"{prompt}\n\nContext from recent news articles:\n{articles_context}",
                 max_tokens=500,
@@ -694,7 +1180,7 @@ class NewsAgentAPI:
             logger.error(f"Error generating news analysis: {e}")
             raise Exception("Failed to generate news analysis")
     
-    def generate_conversational_response(self, user_input: str, conversation_history: List[Dict]) -> str:
+    async def generate_conversational_response(self, user_input: str, conversation_history: List[Dict]) -> str:
         """
         Generate a conversational response using OpenAI
         
@@ -709,29 +1195,26 @@ class NewsAgentAPI:
             raise Exception("OpenAI API key not configured")
         
         try:
-            # Format the conversation history for the API
-            messages = [
-                {
+            # Keep the most recent messages that fit in the prompt's token budget
+            budget = HISTORY_TOKEN_BUDGET - estimate_tokens(SYSTEM_PROMPT) - estimate_tokens(user_input)
+            recent = []
+            for msg in islice(reversed(conversation_history), PROMPT_MAX_MESSAGES):
+                budget -= estimate_tokens(msg.get("content"))
+                if budget < 0:
+                    break
+                recent.append({
                     "role": msg.get("role"),
                     "content": msg.get("content")
-                }
-                for msg in conversation_history
-            ]
+                })
             
-            # Add system message
-            messages.insert(0, {
-                "role": "system",
-                "content": "You are News Agent, an AI assistant that helps users stay informed about current events. Your goal is to provide accurate, helpful, and informative responses about news and current events. You can search for news, summarize articles, and discuss topics in a conversational way."
-            })
-            
-            # Add the new user message
-            messages.append({
-                "role": "user",
-                "content": user_input
-            })
+            messages = [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                *reversed(recent),
+                {"role": "user", "content": user_input}
+            ]
             
             # Generate the completion
-            response = openai.chat.completions.create(
+            response = await openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=messages,
                 max_tokens=500,
@@ -744,20 +1227,127 @@ class NewsAgentAPI:
             raise Exception("Failed to generate conversational response")
 
 
+# Shared by every request and session so they all use one cache and coalesce
+# their fetches. Its state is only touched from the shared event loop.
+NEWS_API = NewsAgentAPI()
+
+
+SYSTEM_PROMPT = "You are News Agent, an AI assistant that helps users stay informed about current events. Your goal is to provide accurate, helpful, and informative responses about news and current events. You can search for news, summarize articles, and discuss topics in a conversational way."
+
+# Bound the conversation kept per session, and the share of it sent to OpenAI.
+# Older messages are dropped from the history once it is full.
+HISTORY_MAX_MESSAGES = 100
+PROMPT_MAX_MESSAGES = 20
+HISTORY_TOKEN_BUDGET = 3000
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Roughly estimate the number of tokens in a message (about 4 characters each)"""
+    return len(text or '') // 4 + 1
+
+
+# Keyword groups used for intent detection, in order of precedence within each group
+INTENT_KEYWORDS = {
+    'headlines': ['headlines', 'today', 'breaking news', 'latest headlines'],
+    'categories': ['politics', 'business', 'technology', 'sports', 'health', 'science', 'world'],
+    'publications': ['wall street journal', 'new york times', 'washington post', 'cnn', 'bbc', 'fox news'],
+    'topics': ['politics', 'business', 'technology', 'health', 'science', 'sports', 'entertainment'],
+    'preferences': ['preferences', 'settings', 'configure'],
+    'keywords': ['ukraine', 'election', 'covid', 'climate']
+}
+
+DISCUSSION_PATTERN = re.compile(r'about\s+(.+?)\s+news', re.IGNORECASE)
+TOPIC_FALLBACK_PATTERN = re.compile(r'(?:about|regarding|on|related to)\s+(.+)', re.IGNORECASE)
+
+
+def _group_intent_phrases() -> List[tuple]:
+    """List each intent keyword with the (group, rank) pairs it belongs to"""
+    groups_by_phrase = {}
+    for group, phrases in INTENT_KEYWORDS.items():
+        for rank, phrase in enumerate(phrases):
+            groups_by_phrase.setdefault(phrase, []).append((group, rank))
+    return list(groups_by_phrase.items())
+
+
+def _build_intent_automaton() -> ahocorasick.Automaton:
+    """Compile every intent keyword into one Aho-Corasick automaton"""
+    automaton = ahocorasick.Automaton()
+    for phrase, groups in INTENT_PHRASES:
+        automaton.add_word(phrase, (phrase, groups))
+    automaton.make_automaton()
+    return automaton
+
+
+def _build_intent_database() -> Optional['hyperscan.Database']:
+    """Compile every intent keyword into one caseless Hyperscan database"""
+    if hyperscan is None:
+        return None
+    
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[re.escape(phrase).encode() for phrase, _ in INTENT_PHRASES],
+        ids=list(range(len(INTENT_PHRASES))),
+        elements=len(INTENT_PHRASES),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(INTENT_PHRASES)
+    )
+    return database
+
+
+INTENT_PHRASES = _group_intent_phrases()
+INTENT_AUTOMATON = _build_intent_automaton()
+INTENT_DATABASE = _build_intent_database()
+
+
+def find_intent_keywords(user_input: str) -> Dict[str, tuple]:
+    """
+    Find every intent keyword in the input in a single pass
+    
+    Hyperscan matches the raw input without making a lowercased copy of it;
+    without Hyperscan the input is lowercased and run through the automaton.
+    
+    Args:
+        user_input: User's input message
+        
+    Returns:
+        Highest-ranked (rank, phrase) match of each keyword group
+    """
+    matches = {}
+    
+    def add_match(phrase, groups):
+        for group, rank in groups:
+            if group not in matches or rank < matches[group][0]:
+                matches[group] = (rank, phrase)
+    
+    if INTENT_DATABASE is not None:
+        def on_match(phrase_id, start, end, flags, context):
+            add_match(*INTENT_PHRASES[phrase_id])
+        
+        INTENT_DATABASE.scan(user_input.encode(), match_event_handler=on_match)
+    else:
+        for _, (phrase, groups) in INTENT_AUTOMATON.iter(user_input.lower()):
+            add_match(phrase, groups)
+    
+    return matches
+
+
 class NewsAgent:
     """
     Core News Agent that processes user requests and manages conversation
     """
     
-    def __init__(self):
+    # One instance is kept per user session, so skip the per-instance __dict__
+    __slots__ = ('user_id', 'user_preferences', 'conversation_history', 'news_agent_api')
+    
+    def __init__(self, user_id: Optional[str] = None):
+        self.user_id = user_id
         self.user_preferences = {
             'favorite_topics': [],
             'favorite_publications': [],
             'update_frequency': 'daily',
             'region': 'us'
         }
-        self.conversation_history = []
-        self.news_agent_api = NewsAgentAPI()
+        self.conversation_history = deque(maxlen=HISTORY_MAX_MESSAGES)
+        self.news_agent_api = NEWS_API
     
     async def initialize(self, user_preferences: Optional[Dict] = None) -> str:
         """
@@ -776,8 +1366,9 @@ class NewsAgent:
         
         # Get initial headlines
         try:
-            headlines = self.news_agent_api.get_top_headlines(
-                country=self.user_preferences.get('region', 'us') if self.user_preferences.get('region') != 'global' else 'us'
+            headlines = await self.news_agent_api.get_top_headlines(
+                country=self.user_preferences.get('region', 'us') if self.user_preferences.get('region') != 'global' else 'us',
+                limit=5
             )
             headline_titles = [headline.get('title') for headline in headlines[:5] if headline.get('title')]
             
@@ -796,35 +1387,41 @@ class NewsAgent:
         Returns:
             Agent's response
         """
-        # Add to conversation history
-        self.conversation_history.append({"role": "user", "content": user_input})
-        
-        # Detect intent from user input
-        intent = self.detect_intent(user_input)
-        logger.info(f"Detected intent: {intent}")
-        
-        # Process the intent
-        try:
-            if intent['type'] == 'fetch_headlines':
-                response = await self.handle_headlines_request(intent)
-            elif intent['type'] == 'fetch_specific_publication':
-                response = await self.handle_publication_request(intent['publication'])
-            elif intent['type'] == 'fetch_topic':
-                response = await self.handle_topic_request(intent['topic'])
-            elif intent['type'] == 'discussion':
-                response = await self.discuss_news(user_input)
-            elif intent['type'] == 'update_preferences':
-                response = self.update_user_preferences(intent.get('preferences', {}))
-            else:
-                response = await self.discuss_news(user_input)
-        except Exception as e:
-            logger.error(f"Error processing request: {e}")
-            response = f"I'm sorry, I encountered an error while processing your request. Please try again or ask something else."
-        
-        # Add to conversation history
-        self.conversation_history.append({"role": "assistant", "content": response})
-        
-        return response
+        async with session_lock(self.user_id):
+            # Add to conversation history
+            user_message = {"role": "user", "content": user_input}
+            self.conversation_history.append(user_message)
+            
+            # Detect intent from user input
+            intent = self.detect_intent(user_input)
+            logger.info(f"Detected intent: {intent}")
+            
+            # Process the intent
+            try:
+                if intent['type'] == 'fetch_headlines':
+                    response = await self.handle_headlines_request(intent)
+                elif intent['type'] == 'fetch_specific_publication':
+                    response = await self.handle_publication_request(intent['publication'])
+                elif intent['type'] == 'fetch_topic':
+                    response = await self.handle_topic_request(intent['topic'])
+                elif intent['type'] == 'discussion':
+                    response = await self.discuss_news(user_input)
+                elif intent['type'] == 'update_preferences':
+                    response = self.update_user_preferences(intent.get('preferences', {}))
+                else:
+                    response = await self.discuss_news(user_input)
+            except Exception as e:
+                logger.error(f"Error processing request: {e}")
+                response = f"I'm sorry, I encountered an error while processing your request. Please try again or ask something else."
+            
+            # Add to conversation history
+            assistant_message = {"role": "assistant", "content": response}
+            self.conversation_history.append(assistant_message)
+            
+            if self.user_id:
+                await save_session_state(self.user_id, self.user_preferences, [user_message, assistant_message])
+            
+            return response
     
     @staticmethod
     def detect_intent(user_input: str) -> Dict:
@@ -837,69 +1434,49 @@ class NewsAgent:
         Returns:
             Intent dictionary
         """
-        import re
-
-        input_lower = user_input.lower().strip()
+        input_stripped = user_input.strip()
 
         # ─── 1) Free-form discussion whenever user asks “tell me about …” ───
-        if input_lower.startswith('tell me about'):
+        if input_stripped[:13].lower() == 'tell me about':
             return {'type': 'discussion'}
 
         # ─── 2) Also treat “about <something> news” as discussion ───
-        m = re.search(r'about\s+(.+?)\s+news', user_input, re.IGNORECASE)
+        m = DISCUSSION_PATTERN.search(user_input)
         if m:
             return {'type': 'discussion'}
 
+        matches = find_intent_keywords(input_stripped)
+
         # ─── 3) Explicit headline requests ───
-        if any(phrase in input_lower for phrase in [
-            'headlines', 'today', 'breaking news', 'latest headlines'
-        ]):
+        if 'headlines' in matches:
             intent = {'type': 'fetch_headlines'}
             # category sniffing
-            categories = [
-                'politics', 'business', 'technology',
-                'sports', 'health', 'science', 'world'
-            ]
-            for category in categories:
-                if category in input_lower:
-                    intent['category'] = category
-                    break
+            if 'categories' in matches:
+                intent['category'] = matches['categories'][1]
             return intent
 
         # ─── 4) Specific publication requests ───
-        publications = [
-            'wall street journal', 'new york times',
-            'washington post', 'cnn', 'bbc', 'fox news'
-        ]
-        for pub in publications:
-            if pub in input_lower:
-                return {'type': 'fetch_specific_publication', 'publication': pub}
+        if 'publications' in matches:
+            return {'type': 'fetch_specific_publication', 'publication': matches['publications'][1]}
 
         # ─── 5) Simple topic keywords ───
-        topics = [
-            'politics', 'business', 'technology',
-            'health', 'science', 'sports', 'entertainment'
-        ]
-        for topic in topics:
-            if topic in input_lower:
-                return {'type': 'fetch_topic', 'topic': topic}
+        if 'topics' in matches:
+            return {'type': 'fetch_topic', 'topic': matches['topics'][1]}
 
         # ─── 6) Generic “about/related to” fallback ───
         # (still ends up fetching topic titles)
-        fallback = re.search(r'(?:about|regarding|on|related to)\s+(.+)', input_lower)
+        fallback = TOPIC_FALLBACK_PATTERN.search(input_stripped)
         if fallback:
-            t = fallback.group(1).split()[0]
+            t = fallback.group(1).split()[0].lower()
             return {'type': 'fetch_topic', 'topic': t}
 
         # ─── 7) Preference updates ───
-        if any(word in input_lower for word in ['preferences', 'settings', 'configure']):
+        if 'preferences' in matches:
             return {'type': 'update_preferences'}
 
         # ─── 8) Hard-coded specific keywords ───
-        specific_keywords = ['ukraine', 'election', 'covid', 'climate']
-        for keyword in specific_keywords:
-            if keyword in input_lower:
-                return {'type': 'fetch_topic', 'topic': keyword}
+        if 'keywords' in matches:
+            return {'type': 'fetch_topic', 'topic': matches['keywords'][1]}
 
         # ─── 9) Default to open-ended discussion ───
         return {'type': 'discussion'}
@@ -922,7 +1499,7 @@ class NewsAgent:
             
             category = intent.get('category', '')
                 
-            headlines = self.news_agent_api.get_top_headlines(country=region, category=category)
+            headlines = await self.news_agent_api.get_top_headlines(country=region, category=category, limit=5)
             headline_titles = [headline.get('title') for headline in headlines[:5] if headline.get('title')]
             
             if headline_titles:
@@ -944,7 +1521,7 @@ class NewsAgent:
             Publication articles response
         """
         try:
-            articles = self.news_agent_api.get_from_publication(publication)
+            articles = await self.news_agent_api.get_from_publication(publication, limit=5)
             article_titles = [article.get('title') for article in articles[:5] if article.get('title')]
             
             if article_titles:
@@ -966,7 +1543,7 @@ class NewsAgent:
             Topic articles response
         """
         try:
-            articles = self.news_agent_api.get_news_by_topic(topic)
+            articles = await self.news_agent_api.get_news_by_topic(topic, limit=5)
             article_titles = [article.get('title') for article in articles[:5] if article.get('title')]
             
             if article_titles:
@@ -989,7 +1566,7 @@ class NewsAgent:
         """
         try:
             if OPENAI_API_KEY:
-                return self.news_agent_api.generate_conversational_response(
+                return await self.news_agent_api.generate_conversational_response(
                     user_input, 
                     self.conversation_history
                 )
@@ -1034,12 +1611,140 @@ class NewsAgent:
             return "Your news preferences have been updated."
 
 
-# Store user sessions
-user_sessions = {}
+# How long an idle session is kept in Redis, in seconds
+SESSION_TTL = 86400
+
+# Store user sessions, dropping the least recently used ones beyond the limit.
+# With Redis behind them, local copies expire quickly so that turns handled by
+# other workers show up.
+if redis_client is not None:
+    user_sessions = TTLCache(maxsize=10000, ttl=60)
+else:
+    user_sessions = LRUCache(maxsize=10000)
+user_sessions_lock = threading.Lock()
+
+# Locks serializing each user's turns so they don't interleave in the
+# conversation history. They're keyed by user ID rather than held by the
+# NewsAgent, which may be replaced while a turn is in flight, and are only
+# created and awaited by coroutines on the shared loop. A lock is dropped once
+# no turn holds or waits on it.
+session_locks = weakref.WeakValueDictionary()
+
+
+def session_lock(user_id: Optional[str]) -> asyncio.Lock:
+    """
+    Get the lock serializing a user's turns, creating it if needed
+    
+    Must be called from a coroutine running on the shared event loop.
+    
+    Args:
+        user_id: User ID
+        
+    Returns:
+        The user's lock
+    """
+    lock = session_locks.get(user_id)
+    if lock is None:
+        lock = session_locks[user_id] = asyncio.Lock()
+    return lock
+
+
+async def load_session_state(user_id: str) -> Optional[tuple]:
+    """
+    Load a user's preferences and conversation history from Redis
+    
+    Args:
+        user_id: User ID
+        
+    Returns:
+        (preferences, history) tuple, or None if Redis holds no session
+    """
+    if redis_client is None:
+        return None
+    
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(f"v1:session:{user_id}:preferences")
+            pipe.lrange(f"v1:session:{user_id}:history", 0, -1)
+            preferences, history = await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Error loading session {user_id} from Redis: {e}")
+        return None
+    
+    if preferences is None and not history:
+        return None
+    
+    return (
+        orjson.loads(preferences) if preferences is not None else {},
+        [orjson.loads(message) for message in history]
+    )
+
+
+async def save_session_state(user_id: str, preferences: Dict, messages: List[Dict] = ()):
+    """
+    Save a user's preferences and append messages to their history in Redis
+    
+    Messages are pushed onto a Redis list so that concurrent turns never
+    overwrite each other's history.
+    
+    Args:
+        user_id: User ID
+        preferences: User's preferences
+        messages: New conversation messages
+    """
+    if redis_client is None:
+        return
+    
+    history_key = f"v1:session:{user_id}:history"
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(f"v1:session:{user_id}:preferences", orjson.dumps(preferences), ex=SESSION_TTL)
+            if messages:
+                pipe.rpush(history_key, *(orjson.dumps(message) for message in messages))
+                pipe.ltrim(history_key, -HISTORY_MAX_MESSAGES, -1)
+            pipe.expire(history_key, SESSION_TTL)
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Error saving session {user_id} to Redis: {e}")
+
+
+async def update_session_preferences(user_id: str, session: NewsAgent, preferences: Dict) -> str:
+    """
+    Update a user's preferences and save them, waiting for any turn in progress
+    
+    Args:
+        user_id: User ID
+        session: The user's NewsAgent
+        preferences: Preferences to update
+        
+    Returns:
+        Confirmation message
+    """
+    async with session_lock(user_id):
+        message = session.update_user_preferences(preferences)
+        await save_session_state(user_id, session.user_preferences)
+    return message
+
+
+async def clear_session_history(user_id: str):
+    """
+    Delete a user's conversation history from Redis
+    
+    Args:
+        user_id: User ID
+    """
+    if redis_client is None:
+        return
+    
+    try:
+        await redis_client.delete(f"v1:session:{user_id}:history")
+    except redis.RedisError as e:
+        logger.warning(f"Error clearing session {user_id} in Redis: {e}")
+
 
 def get_user_session(user_id: str) -> NewsAgent:
     """
-    Get or create a user session
+    Get or create a user session, restoring it from Redis if it is stored there
     
     Args:
         user_id: User ID
@@ -1047,10 +1752,21 @@ def get_user_session(user_id: str) -> NewsAgent:
     Returns:
         NewsAgent instance
     """
-    if user_id not in user_sessions:
-        user_sessions[user_id] = NewsAgent()
+    with user_sessions_lock:
+        session = user_sessions.get(user_id)
+    if session is not None:
+        return session
+    
+    session = NewsAgent(user_id)
+    state = run_async(load_session_state(user_id)) if redis_client is not None else None
+    if state is not None:
+        preferences, history = state
+        session.user_preferences.update(preferences)
+        session.conversation_history.extend(history)
     
-    return user_sessions[user_id]
+    with user_sessions_lock:
+        # Keep the first session if another request created one meanwhile
+        return user_sessions.setdefault(user_id, session)
 
 
 # Routes
@@ -1075,7 +1791,7 @@ def test_api():
     })
 
 @app.route('/api/initialize', methods=['POST'])
-def initialize_session():
+async def initialize_session():
     data = request.json
     user_id = data.get('userId')
     preferences = data.get('preferences')
@@ -1089,13 +1805,15 @@ def initialize_session():
             }), 400
         
         session = get_user_session(user_id)
-
+        welcome_message = await run_on_loop(session.initialize(preferences))
         
         # Add initial message to conversation history
-        session.conversation_history.append({
+        message = {
             "role": "assistant",
             "content": welcome_message
-        })
+        }
+        session.conversation_history.append(message)
+        await run_on_loop(save_session_state(user_id, session.user_preferences, [message]))
         
         return jsonify({
             "success": True,
@@ -1109,10 +1827,8 @@ def initialize_session():
         }), 500
 
 
-import asyncio
-
 @app.route('/api/request', methods=['POST'])
-def process_request():
+async def process_request():
     data       = request.json
     user_id    = data.get('userId')
     user_input = data.get('userInput')
@@ -1122,8 +1838,7 @@ def process_request():
 
     session = get_user_session(user_id)
 
-    # ↳ use asyncio.run instead of get_event_loop()
-    response_text = asyncio.run(session.process_request(user_input))
+    response_text = await run_on_loop(session.process_request(user_input))
 
     return jsonify({
         "success": True,
@@ -1131,14 +1846,13 @@ def process_request():
     })
 
 @app.route('/api/headlines', methods=['GET'])
-def get_headlines():
+async def get_headlines():
     """Get top headlines"""
     try:
         country = request.args.get('country', 'us')
         category = request.args.get('category', '')
         
-        news_agent_api = NewsAgentAPI()
-        headlines = news_agent_api.get_top_headlines(country, category)
+        headlines = await run_on_loop(NEWS_API.get_top_headlines(country, category))
         
         return jsonify({
             "success": True,
@@ -1153,11 +1867,10 @@ def get_headlines():
 
 
 @app.route('/api/publication/<publication>', methods=['GET'])
-def get_from_publication(publication):
+async def get_from_publication(publication):
     """Get news from a specific publication"""
     try:
-        news_agent_api = NewsAgentAPI()
-        articles = news_agent_api.get_from_publication(publication)
+        articles = await run_on_loop(NEWS_API.get_from_publication(publication))
         
         return jsonify({
             "success": True,
@@ -1172,13 +1885,12 @@ def get_from_publication(publication):
 
 
 @app.route('/api/topic/<topic>', methods=['GET'])
-def get_by_topic(topic):
+async def get_by_topic(topic):
     """Get news by topic"""
     try:
         language = request.args.get('language', 'en')
         
-        news_agent_api = NewsAgentAPI()
-        articles = news_agent_api.get_news_by_topic(topic, language)
+        articles = await run_on_loop(NEWS_API.get_news_by_topic(topic, language))
         
         return jsonify({
             "success": True,
@@ -1193,7 +1905,7 @@ def get_by_topic(topic):
 
 
 @app.route('/api/analyze', methods=['POST'])
-def analyze_news():
+async def analyze_news():
     """Generate news analysis"""
     try:
         data = request.json
@@ -1206,8 +1918,7 @@ def analyze_news():
                 "error": "Missing required fields"
             }), 400
         
-        news_agent_api = NewsAgentAPI()
-        analysis = news_agent_api.generate_news_analysis(articles, prompt)
+        analysis = await run_on_loop(NEWS_API.generate_news_analysis(articles, prompt))
         
         return jsonify({
             "success": True,
@@ -1229,7 +1940,7 @@ def get_history(user_id):
         
         return jsonify({
             "success": True,
-            "history": session.conversation_history
+            "history": list(session.conversation_history)
         })
     except Exception as e:
         logger.error(f"Error fetching conversation history: {e}")
@@ -1240,11 +1951,12 @@ def get_history(user_id):
 
 
 @app.route('/api/history/<user_id>', methods=['DELETE'])
-def clear_history(user_id):
+async def clear_history(user_id):
     """Clear user conversation history"""
     try:
         session = get_user_session(user_id)
-        session.conversation_history = []
+        session.conversation_history.clear()
+        await run_on_loop(clear_session_history(user_id))
         
         return jsonify({
             "success": True,
@@ -1259,7 +1971,7 @@ def clear_history(user_id):
 
 
 @app.route('/api/preferences/<user_id>', methods=['POST'])
-def update_preferences(user_id):
+async def update_preferences(user_id):
     """Update user preferences"""
     try:
         data = request.json
@@ -1272,7 +1984,7 @@ def update_preferences(user_id):
             }), 400
         
         session = get_user_session(user_id)
-        message = session.update_user_preferences(preferences)
+        message = await run_on_loop(update_session_preferences(user_id, session, preferences))
         
         return jsonify({
             "success": True,
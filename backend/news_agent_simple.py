@@ -1,18 +1,147 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import os
+import re
+import threading
+from collections import deque
+import orjson
+import requests
+from cachetools import LRUCache, TTLCache
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from dotenv import load_dotenv
 
+from orjson_provider import OrjsonProvider
+
 # Load environment variables
 load_dotenv()
 
 # Create Flask app
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
-# Simple in-memory storage for user sessions
-user_sessions = {}
+# Simple in-memory storage for user sessions, dropping the least recently
+# used ones beyond the limit. Guarded by a lock since LRU reads reorder it.
+user_sessions = LRUCache(maxsize=10000)
+sessions_lock = threading.Lock()
+
+# Shared HTTP session so repeat calls to the NYT API reuse open connections
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
+# Connect and read timeouts for NYT API calls, in seconds
+REQUEST_TIMEOUT = (3, 5)
+
+# Transformed NYT results, kept briefly since the upstream data only changes
+# every few minutes
+nyt_cache = TTLCache(maxsize=256, ttl=120)
+nyt_cache_lock = threading.Lock()
+
+# One lock per cache key being fetched, so concurrent misses make one NYT call
+fetch_locks = {}
+
+
+def cached_fetch(key, load):
+    """
+    Get cached NYT results, loading them once on a miss
+    
+    Args:
+        key: Cache key identifying the endpoint and parameters
+        load: Function that fetches and transforms the results
+        
+    Returns:
+        The cached or freshly loaded results
+    """
+    with nyt_cache_lock:
+        if key in nyt_cache:
+            return nyt_cache[key]
+        key_lock = fetch_locks.setdefault(key, threading.Lock())
+    
+    with key_lock:
+        # Another request may have filled the cache while this one waited
+        with nyt_cache_lock:
+            if key in nyt_cache:
+                return nyt_cache[key]
+        
+        try:
+            results = load()
+            with nyt_cache_lock:
+                nyt_cache[key] = results
+            return results
+        finally:
+            with nyt_cache_lock:
+                fetch_locks.pop(key, None)
+
+# Keywords for intent detection, each group compiled into one pattern. Like
+# plain substring checks, these also match inside longer words.
+HEADLINE_PATTERN = re.compile(r'headlines|news|today')
+PUBLICATION_PATTERN = re.compile(r'new york times|nyt')
+TOPIC_PATTERN = re.compile(r'about|regarding|on|related to')
+
+# Words that introduce the topic of a request
+TOPIC_MARKERS = frozenset({'about', 'regarding', 'on'})
+
+# Categories in order of precedence when several are mentioned
+CATEGORIES = ('politics', 'business', 'technology', 'sports', 'health', 'science')
+CATEGORY_PATTERN = re.compile('|'.join(CATEGORIES))
+
+# General news categories to NYT section names
+NYT_SECTIONS = {
+    'world': 'world',
+    'politics': 'politics',
+    'business': 'business',
+    'technology': 'technology',
+    'science': 'science',
+    'health': 'health',
+    'sports': 'sports'
+}
+
+# Publication names served from the NYT API
+NYT_NAMES = frozenset({'new york times', 'nyt', 'ny times'})
+
+def top_story_to_article(article):
+    """Convert an item from the NYT Top Stories API to an article"""
+    image_url = next(
+        (media.get('url') for media in article.get('multimedia') or ()
+         if media.get('format') == 'mediumThreeByTwo210'),
+        None
+    )
+    
+    return {
+        'title': article.get('title'),
+        'description': article.get('abstract'),
+        'url': article.get('url'),
+        'imageUrl': image_url,
+        'source': 'The New York Times',
+        'publishedAt': article.get('published_date'),
+        'section': article.get('section')
+    }
+
+
+def search_doc_to_article(doc):
+    """Convert a document from the NYT Article Search API to an article"""
+    # Extract image URL if available
+    image_url = next(
+        (f"https://static01.nyt.com/{multimedia.get('url')}"
+         for multimedia in doc.get('multimedia') or ()
+         if multimedia.get('type') == 'image'),
+        None
+    )
+    
+    return {
+        'title': doc.get('headline', {}).get('main'),
+        'description': doc.get('abstract') or doc.get('snippet'),
+        'url': doc.get('web_url'),
+        'imageUrl': image_url,
+        'source': 'The New York Times',
+        'publishedAt': doc.get('pub_date'),
+        'section': doc.get('section_name')
+    }
+
+
+# Conversation messages kept per session; older ones are dropped
+HISTORY_MAX_MESSAGES = 100
 
 # Basic routes that should definitely work
 @app.route('/')
@@ -41,21 +170,17 @@ def initialize_session():
         user_id = data.get('userId', 'test-user')
         preferences = data.get('preferences', {})
         
-        # Store the user preferences in memory
-        user_sessions[user_id] = {
-            'preferences': preferences,
-            'conversation_history': []
-        }
-        
-        # Add welcome message to conversation history
+        # Store the user preferences in memory, with the welcome message as
+        # the first entry of the conversation history
         welcome_message = f"Welcome to News Agent! Session initialized for user {user_id}"
-        if user_id in user_sessions:
-            if 'conversation_history' not in user_sessions[user_id]:
-                user_sessions[user_id]['conversation_history'] = []
-            user_sessions[user_id]['conversation_history'].append({
-                'role': 'assistant',
-                'content': welcome_message
-            })
+        with sessions_lock:
+            user_sessions[user_id] = {
+                'preferences': preferences,
+                'conversation_history': deque([{
+                    'role': 'assistant',
+                    'content': welcome_message
+                }], maxlen=HISTORY_MAX_MESSAGES)
+            }
         
         return jsonify({
             "success": True,
@@ -80,45 +205,24 @@ def get_headlines():
         # Map category to section name
         section = 'home'
         if category:
-            section_map = {
-                'world': 'world',
-                'politics': 'politics',
-                'business': 'business',
-                'technology': 'technology',
-                'science': 'science',
-                'health': 'health',
-                'sports': 'sports'
-            }
-            section = section_map.get(category.lower(), 'home')
+            section = NYT_SECTIONS.get(category.lower(), 'home')
         
-        # Call NYT API
-        nyt_url = f'https://api.nytimes.com/svc/topstories/v2/{section}.json'
-        response = requests.get(nyt_url, params={'api-key': nyt_api_key})
-        
-        if response.status_code != 200:
-            raise Exception(f"NYT API returned status code {response.status_code}")
-        
-        data = response.json()
-        
-        # Transform the response data
-        headlines = []
-        for article in data.get('results', [])[:10]:  # Limit to 10 articles
-            image_url = None
-            if article.get('multimedia') and len(article.get('multimedia')) > 0:
-                for media in article.get('multimedia'):
-                    if media.get('format') == 'mediumThreeByTwo210':
-                        image_url = media.get('url')
-                        break
+        def load():
+            # Call NYT API
+            nyt_url = f'https://api.nytimes.com/svc/topstories/v2/{section}.json'
+            response = http_session.get(nyt_url, params={'api-key': nyt_api_key}, timeout=REQUEST_TIMEOUT)
             
-            headlines.append({
-                'title': article.get('title'),
-                'description': article.get('abstract'),
-                'url': article.get('url'),
-                'imageUrl': image_url,
-                'source': 'The New York Times',
-                'publishedAt': article.get('published_date'),
-                'section': article.get('section')
-            })
+            if response.status_code != 200:
+                raise Exception(f"NYT API returned status code {response.status_code}")
+            
+            data = orjson.loads(response.content)
+            
+            # Transform the response data
+            headlines = [top_story_to_article(article) for article in data.get('results', [])[:10]]  # Limit to 10 articles
+            
+            return headlines
+        
+        headlines = cached_fetch(('topstories', section), load)
         
         return jsonify({
             "success": True,
@@ -127,6 +231,7 @@ def get_headlines():
     except Exception as e:
         print(f"Error fetching headlines: {e}")
         # Fall back to mock data
+        now_iso = datetime.now().isoformat()
         return jsonify({
             "success": True,
             "headlines": [
@@ -135,14 +240,14 @@ def get_headlines():
                     "description": "Latest developments in AI and machine learning",
                     "url": "https://example.com/article1",
                     "source": "Tech News",
-                    "publishedAt": datetime.now().isoformat()
+                    "publishedAt": now_iso
                 },
                 {
                     "title": "Global Markets Update",
                     "description": "Stock markets react to recent economic news",
                     "url": "https://example.com/article2",
                     "source": "Financial Times",
-                    "publishedAt": datetime.now().isoformat()
+                    "publishedAt": now_iso
                 }
             ]
         })
@@ -156,41 +261,28 @@ def get_by_topic(topic):
         # Use NYT Article Search API
         nyt_api_key = os.getenv('NYT_API_KEY', 'ol1fhGLHJtvD007tp7cGduT5JuKdf9bz')
         
-        # Call NYT API
-        nyt_url = 'https://api.nytimes.com/svc/search/v2/articlesearch.json'
-        params = {
-            'api-key': nyt_api_key,
-            'q': topic,
-            'sort': 'newest'
-        }
-        
-        response = requests.get(nyt_url, params=params)
-        
-        if response.status_code != 200:
-            raise Exception(f"NYT API returned status code {response.status_code}")
-        
-        data = response.json()
-        
-        # Transform the response data
-        articles = []
-        for doc in data.get('response', {}).get('docs', [])[:10]:  # Limit to 10 articles
-            # Extract image URL if available
-            image_url = None
-            if doc.get('multimedia'):
-                for multimedia in doc.get('multimedia', []):
-                    if multimedia.get('type') == 'image':
-                        image_url = f"https://static01.nyt.com/{multimedia.get('url')}"
-                        break
+        def load():
+            # Call NYT API
+            nyt_url = 'https://api.nytimes.com/svc/search/v2/articlesearch.json'
+            params = {
+                'api-key': nyt_api_key,
+                'q': topic,
+                'sort': 'newest'
+            }
             
-            articles.append({
-                'title': doc.get('headline', {}).get('main'),
-                'description': doc.get('abstract') or doc.get('snippet'),
-                'url': doc.get('web_url'),
-                'imageUrl': image_url,
-                'source': 'The New York Times',
-                'publishedAt': doc.get('pub_date'),
-                'section': doc.get('section_name')
-            })
+            response = http_session.get(nyt_url, params=params, timeout=REQUEST_TIMEOUT)
+            
+            if response.status_code != 200:
+                raise Exception(f"NYT API returned status code {response.status_code}")
+            
+            data = orjson.loads(response.content)
+            
+            # Transform the response data
+            articles = [search_doc_to_article(doc) for doc in data.get('response', {}).get('docs', [])[:10]]  # Limit to 10 articles
+            
+            return articles
+        
+        articles = cached_fetch(('articlesearch', topic), load)
         
         return jsonify({
             "success": True,
@@ -217,37 +309,25 @@ def get_from_publication(publication):
     """Get news from a specific publication"""
     try:
         # Currently only supporting NYT
-        if publication.lower() in ['new york times', 'nyt', 'ny times']:
+        if publication.lower() in NYT_NAMES:
             # Use NYT Top Stories API
             nyt_api_key = os.getenv('NYT_API_KEY', 'ol1fhGLHJtvD007tp7cGduT5JuKdf9bz')
             
-            nyt_url = 'https://api.nytimes.com/svc/topstories/v2/home.json'
-            response = requests.get(nyt_url, params={'api-key': nyt_api_key})
-            
-            if response.status_code != 200:
-                raise Exception(f"NYT API returned status code {response.status_code}")
-            
-            data = response.json()
-            
-            # Transform the response data
-            articles = []
-            for article in data.get('results', [])[:10]:  # Limit to 10 articles
-                image_url = None
-                if article.get('multimedia') and len(article.get('multimedia')) > 0:
-                    for media in article.get('multimedia'):
-                        if media.get('format') == 'mediumThreeByTwo210':
-                            image_url = media.get('url')
-                            break
+            def load():
+                nyt_url = 'https://api.nytimes.com/svc/topstories/v2/home.json'
+                response = http_session.get(nyt_url, params={'api-key': nyt_api_key}, timeout=REQUEST_TIMEOUT)
                 
-                articles.append({
-                    'title': article.get('title'),
-                    'description': article.get('abstract'),
-                    'url': article.get('url'),
-                    'imageUrl': image_url,
-                    'source': 'The New York Times',
-                    'publishedAt': article.get('published_date'),
-                    'section': article.get('section')
-                })
+                if response.status_code != 200:
+                    raise Exception(f"NYT API returned status code {response.status_code}")
+                
+                data = orjson.loads(response.content)
+                
+                # Transform the response data
+                articles = [top_story_to_article(article) for article in data.get('results', [])[:10]]  # Limit to 10 articles
+                
+                return articles
+            
+            articles = cached_fetch(('topstories', 'home'), load)
             
             return jsonify({
                 "success": True,
@@ -289,49 +369,41 @@ def process_request():
             }), 400
         
         # Store user message in conversation history
-        if user_id in user_sessions:
-            if 'conversation_history' not in user_sessions[user_id]:
-                user_sessions[user_id]['conversation_history'] = []
-            user_sessions[user_id]['conversation_history'].append({
-                'role': 'user',
-                'content': user_input
-            })
+        with sessions_lock:
+            if user_id in user_sessions:
+                user_sessions[user_id].setdefault('conversation_history', deque(maxlen=HISTORY_MAX_MESSAGES)).append({
+                    'role': 'user',
+                    'content': user_input
+                })
         
         # Simple intent detection
         input_lower = user_input.lower()
         
         # Check for headline requests
-        if any(phrase in input_lower for phrase in ['headlines', 'news', 'today']):
+        if HEADLINE_PATTERN.search(input_lower):
             # Get headlines and include them in the response
             country = 'us'
-            category = ''
             
             # Check for category mentions
-            categories = ['politics', 'business', 'technology', 'sports', 'health', 'science']
-            for cat in categories:
-                if cat in input_lower:
-                    category = cat
-                    break
+            mentioned = CATEGORY_PATTERN.findall(input_lower)
+            category = min(mentioned, key=CATEGORIES.index) if mentioned else ''
             
             response_text = f"Here are the latest {category + ' ' if category else ''}headlines:"
         
         # Check for publication requests
-        elif any(pub in input_lower for pub in ['new york times', 'nyt']):
+        elif PUBLICATION_PATTERN.search(input_lower):
             response_text = "Here are the latest articles from The New York Times:"
         
         # Check for topic requests
-        elif any(phrase in input_lower for phrase in ['about', 'regarding', 'on', 'related to']):
-            # Try to extract topic
+        elif TOPIC_PATTERN.search(input_lower):
+            # Try to extract topic: the first word after a topic marker
             words = input_lower.split()
-            potential_topics = []
+            topic = next(
+                (words[i + 1] for i, word in enumerate(words[:-1]) if word in TOPIC_MARKERS),
+                None
+            )
             
-            for i, word in enumerate(words):
-                if word in ['about', 'regarding', 'on']:
-                    if i + 1 < len(words):
-                        potential_topics.append(words[i + 1])
-            
-            if potential_topics:
-                topic = potential_topics[0]
+            if topic:
                 response_text = f"Here are some articles about {topic}:"
             else:
                 response_text = f"I received your message: '{user_input}'. What specific topic would you like to read about?"
@@ -341,11 +413,12 @@ def process_request():
             response_text = f"I received your message: '{user_input}'. What kind of news are you interested in today?"
         
         # Store assistant response in conversation history
-        if user_id in user_sessions:
-            user_sessions[user_id]['conversation_history'].append({
-                'role': 'assistant',
-                'content': response_text
-            })
+        with sessions_lock:
+            if user_id in user_sessions:
+                user_sessions[user_id].setdefault('conversation_history', deque(maxlen=HISTORY_MAX_MESSAGES)).append({
+                    'role': 'assistant',
+                    'content': response_text
+                })
         
         return jsonify({
             "success": True,
@@ -362,16 +435,14 @@ def process_request():
 def get_history(user_id):
     """Get user conversation history"""
     try:
-        if user_id in user_sessions and 'conversation_history' in user_sessions[user_id]:
-            return jsonify({
-                "success": True,
-                "history": user_sessions[user_id]['conversation_history']
-            })
-        else:
-            return jsonify({
-                "success": True,
-                "history": []
-            })
+        with sessions_lock:
+            session = user_sessions.get(user_id, {})
+            history = list(session.get('conversation_history', []))
+        
+        return jsonify({
+            "success": True,
+            "history": history
+        })
     except Exception as e:
         return jsonify({
             "success": False,
@@ -382,8 +453,9 @@ def get_history(user_id):
 def clear_history(user_id):
     """Clear user conversation history"""
     try:
-        if user_id in user_sessions:
-            user_sessions[user_id]['conversation_history'] = []
+        with sessions_lock:
+            if user_id in user_sessions:
+                user_sessions[user_id]['conversation_history'] = deque(maxlen=HISTORY_MAX_MESSAGES)
         
         return jsonify({
             "success": True,
@@ -408,25 +480,23 @@ def update_preferences(user_id):
                 "error": "Missing required fields"
             }), 400
         
-        if user_id not in user_sessions:
-            user_sessions[user_id] = {}
-        
-        user_sessions[user_id]['preferences'] = preferences
+        with sessions_lock:
+            user_sessions.setdefault(user_id, {})['preferences'] = preferences
         
         # Generate a message about the updated preferences
-        response_message = "Your news preferences have been updated."
+        message_parts = ["Your news preferences have been updated."]
         
         if 'favorite_topics' in preferences and preferences['favorite_topics']:
             topics_str = ', '.join(preferences['favorite_topics'])
-            response_message += f" I'll focus on {topics_str}."
+            message_parts.append(f" I'll focus on {topics_str}.")
         
         if 'favorite_publications' in preferences and preferences['favorite_publications']:
             pubs_str = ', '.join(preferences['favorite_publications'])
-            response_message += f" I'll include sources like {pubs_str}."
+            message_parts.append(f" I'll include sources like {pubs_str}.")
         
         return jsonify({
             "success": True,
-            "message": response_message
+            "message": ''.join(message_parts)
         })
     except Exception as e:
         return jsonify({
@@ -0,0 +1,39 @@
+"""
+Flask JSON provider backed by orjson
+"""
+
+from typing import Any
+
+import orjson
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Encodes and decodes JSON with orjson, keeping Flask's options for key
+    sorting and pretty-printing in debug mode
+    """
+
+    def _options(self, indent: bool = False, sort_keys: bool = None) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = self._options(bool(kwargs.get('indent')), kwargs.get('sort_keys'))
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+
+        # Encode straight to bytes rather than through an intermediate str
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
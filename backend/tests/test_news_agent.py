@@ -3,24 +3,48 @@ Test cases for the News Agent Python Backend
 """
 
 import unittest
-import json
-import os
-from unittest.mock import patch, MagicMock
-from dotenv import load_dotenv
+import asyncio
+import aiohttp
+import fakeredis
+import time
+from unittest.mock import patch, MagicMock, AsyncMock
 
-# Load environment variables for testing
-load_dotenv()
+# Import the classes under test
+from news_agent_python import NewsAgent, NewsAgentAPI, NEWSAPI_FIELDS, _compile_fields
 
-# Import the Flask app and classes
-from news_agent_python import app, NewsAgent, NewsAgentAPI
+# NewsAPI top headlines response shared by the tests
+HEADLINES_API_RESPONSE = {
+    'status': 'ok',
+    'articles': [
+        {
+            'title': 'Test Headline 1',
+            'description': 'Test Description 1',
+            'url': 'http://test.com/1',
+            'urlToImage': 'http://test.com/image1.jpg',
+            'source': {'name': 'Test Source'},
+            'publishedAt': '2023-05-01T12:00:00Z',
+            'content': 'Test content 1'
+        },
+        {
+            'title': 'Test Headline 2',
+            'description': 'Test Description 2',
+            'url': 'http://test.com/2',
+            'urlToImage': 'http://test.com/image2.jpg',
+            'source': {'name': 'Test Source 2'},
+            'publishedAt': '2023-05-01T13:00:00Z',
+            'content': 'Test content 2'
+        }
+    ]
+}
 
 
-class TestNewsAgent(unittest.TestCase):
+class TestNewsAgent(unittest.IsolatedAsyncioTestCase):
     """Test cases for the NewsAgent class"""
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.agent = NewsAgent()
+    @classmethod
+    def setUpClass(cls):
+        """Set up an agent for the tests that don't change its state"""
+        cls.shared_agent = NewsAgent()
     
     @patch.object(NewsAgentAPI, 'get_top_headlines')
     async def test_initialize(self, mock_get_headlines):
@@ -32,17 +56,18 @@ class TestNewsAgent(unittest.TestCase):
             {'title': 'Test Headline 3'}
         ]
         
-        # Initialize with preferences
+        # Initialize a fresh agent with preferences
+        agent = NewsAgent()
         preferences = {
             'favorite_topics': ['tech', 'science'],
             'region': 'us'
         }
         
-        result = await self.agent.initialize(preferences)
+        result = await agent.initialize(preferences)
         
         # Check if preferences were updated
-        self.assertEqual(self.agent.user_preferences['favorite_topics'], ['tech', 'science'])
-        self.assertEqual(self.agent.user_preferences['region'], 'us')
+        self.assertEqual(agent.user_preferences['favorite_topics'], ['tech', 'science'])
+        self.assertEqual(agent.user_preferences['region'], 'us')
         
         # Check if headlines were included in the response
         self.assertIn('Test Headline 1', result)
@@ -54,37 +79,49 @@ class TestNewsAgent(unittest.TestCase):
     
     def test_detect_intent(self):
         """Test intent detection"""
-        # Test headline intent
-        intent = self.agent.detect_intent("Show me the latest headlines")
-        self.assertEqual(intent['type'], 'fetch_headlines')
-        
-        # Test publication intent
-        intent = self.agent.detect_intent("What's new in the Wall Street Journal?")
-        self.assertEqual(intent['type'], 'fetch_specific_publication')
-        self.assertEqual(intent['publication'], 'wall street journal')
+        cases = [
+            # Headline intent
+            ("Show me the latest headlines", {'type': 'fetch_headlines'}),
+            # Publication intent
+            ("What's new in the Wall Street Journal?",
+             {'type': 'fetch_specific_publication', 'publication': 'wall street journal'}),
+            # Topic intent
+            ("Tell me about technology news", {'type': 'fetch_topic', 'topic': 'technology'}),
+            # Specific event intent
+            ("What's happening with Ukraine?", {'type': 'fetch_topic', 'topic': 'ukraine'}),
+            # Preferences intent
+            ("Update my preferences", {'type': 'update_preferences'}),
+            # Default discussion intent
+            ("What do you think about the economy?", {'type': 'discussion'})
+        ]
         
-        # Test topic intent
-        intent = self.agent.detect_intent("Tell me about technology news")
-        self.assertEqual(intent['type'], 'fetch_topic')
-        self.assertEqual(intent['topic'], 'technology')
+        for user_input, expected in cases:
+            with self.subTest(user_input=user_input):
+                intent = self.shared_agent.detect_intent(user_input)
+                self.assertEqual({key: intent.get(key) for key in expected}, expected)
+    
+    async def test_turns_for_same_user_are_serialized(self):
+        """Test that concurrent turns for one user run one after the other"""
+        agent = NewsAgent()
+        order = []
         
-        # Test specific event intent
-        intent = self.agent.detect_intent("What's happening with Ukraine?")
-        self.assertEqual(intent['type'], 'fetch_topic')
-        self.assertEqual(intent['topic'], 'ukraine')
+        async def slow_headlines(intent):
+            order.append('start')
+            await asyncio.sleep(0.01)
+            order.append('end')
+            return "Here are the latest headlines"
         
-        # Test preferences intent
-        intent = self.agent.detect_intent("Update my preferences")
-        self.assertEqual(intent['type'], 'update_preferences')
+        with patch.object(NewsAgent, 'handle_headlines_request', side_effect=slow_headlines):
+            await asyncio.gather(*(agent.process_request("Show me the latest headlines") for _ in range(2)))
         
-        # Test default discussion intent
-        intent = self.agent.detect_intent("What do you think about the economy?")
-        self.assertEqual(intent['type'], 'discussion')
+        self.assertEqual(order, ['start', 'end', 'start', 'end'])
     
     def test_update_user_preferences(self):
         """Test updating user preferences"""
+        agent = NewsAgent()
+        
         # Initial preferences
-        self.assertEqual(self.agent.user_preferences['update_frequency'], 'daily')
+        self.assertEqual(agent.user_preferences['update_frequency'], 'daily')
         
         # Update preferences
         new_prefs = {
@@ -92,14 +129,14 @@ class TestNewsAgent(unittest.TestCase):
             'favorite_topics': ['sports', 'business']
         }
         
-        result = self.agent.update_user_preferences(new_prefs)
+        result = agent.update_user_preferences(new_prefs)
         
         # Check if preferences were updated
-        self.assertEqual(self.agent.user_preferences['update_frequency'], 'hourly')
-        self.assertEqual(self.agent.user_preferences['favorite_topics'], ['sports', 'business'])
+        self.assertEqual(agent.user_preferences['update_frequency'], 'hourly')
+        self.assertEqual(agent.user_preferences['favorite_topics'], ['sports', 'business'])
         
         # Check that other preferences remain unchanged
-        self.assertEqual(self.agent.user_preferences['region'], 'global')
+        self.assertEqual(agent.user_preferences['region'], 'global')
 
 
 class TestNewsAgentAPI(unittest.TestCase):
@@ -107,41 +144,25 @@ class TestNewsAgentAPI(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures"""
+        # Keep the cache out of any Redis configured in the environment
+        patcher = patch('news_agent_python.redis_client', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        # Query NewsAPI only, whatever keys the environment provides
         self.api = NewsAgentAPI()
+        self.api.news_api_key = 'test-key'
+        self.api.nyt_api_key = None
+        self.api.guardian_api_key = None
     
-    @patch('requests.get')
-    def test_get_top_headlines(self, mock_get):
+    @patch.object(NewsAgentAPI, '_get_json')
+    def test_get_top_headlines(self, mock_get_json):
         """Test fetching top headlines"""
         # Mock the API response
-        mock_response = MagicMock()
-        mock_response.raise_for_status.return_value = None
-        mock_response.json.return_value = {
-            'status': 'ok',
-            'articles': [
-                {
-                    'title': 'Test Headline 1',
-                    'description': 'Test Description 1',
-                    'url': 'http://test.com/1',
-                    'urlToImage': 'http://test.com/image1.jpg',
-                    'source': {'name': 'Test Source'},
-                    'publishedAt': '2023-05-01T12:00:00Z',
-                    'content': 'Test content 1'
-                },
-                {
-                    'title': 'Test Headline 2',
-                    'description': 'Test Description 2',
-                    'url': 'http://test.com/2',
-                    'urlToImage': 'http://test.com/image2.jpg',
-                    'source': {'name': 'Test Source 2'},
-                    'publishedAt': '2023-05-01T13:00:00Z',
-                    'content': 'Test content 2'
-                }
-            ]
-        }
-        mock_get.return_value = mock_response
+        mock_get_json.return_value = HEADLINES_API_RESPONSE
         
         # Call the method
-        headlines = self.api.get_top_headlines('us', 'technology')
+        headlines = asyncio.run(self.api.get_top_headlines('us', 'technology'))
         
         # Check the results
         self.assertEqual(len(headlines), 2)
@@ -149,84 +170,240 @@ class TestNewsAgentAPI(unittest.TestCase):
         self.assertEqual(headlines[1]['title'], 'Test Headline 2')
         
         # Check that the API was called with correct parameters
-        mock_get.assert_called_once()
-        args, kwargs = mock_get.call_args
+        mock_get_json.assert_called_once()
+        args, kwargs = mock_get_json.call_args
         self.assertEqual(args[0], 'https://newsapi.org/v2/top-headlines')
         self.assertEqual(kwargs['params']['country'], 'us')
         self.assertEqual(kwargs['params']['category'], 'technology')
     
-    def test_map_publication_to_news_api_source(self):
-        """Test mapping publication names to NewsAPI source IDs"""
-        self.assertEqual(self.api.map_publication_to_news_api_source('Wall Street Journal'), 'the-wall-street-journal')
-        self.assertEqual(self.api.map_publication_to_news_api_source('wsj'), 'the-wall-street-journal')
-        self.assertEqual(self.api.map_publication_to_news_api_source('bbc'), 'bbc-news')
-        self.assertEqual(self.api.map_publication_to_news_api_source('unknown publication'), 'unknown publication')
-
-
-class TestFlaskRoutes(unittest.TestCase):
-    """Test cases for the Flask routes"""
+    @patch.object(NewsAgentAPI, '_get_json')
+    def test_get_top_headlines_source_failure(self, mock_get_json):
+        """Test that headlines from working sources are returned when another fails"""
+        # Add NYT as a second source alongside NewsAPI
+        self.api.nyt_api_key = 'test-key'
+        
+        async def respond(url, params):
+            if 'newsapi.org' in url:
+                raise Exception("NewsAPI unavailable")
+            return {'status': 'OK', 'results': [{'title': 'NYT Headline'}]}
+        
+        mock_get_json.side_effect = respond
+        
+        headlines = asyncio.run(self.api.get_top_headlines('us', 'world'))
+        
+        self.assertEqual([headline['title'] for headline in headlines], ['NYT Headline'])
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.app = app.test_client()
-        self.app.testing = True
+    @patch.object(NewsAgentAPI, '_get_json')
+    def test_get_top_headlines_cached(self, mock_get_json):
+        """Test that repeated headline requests are served from the cache"""
+        mock_get_json.return_value = {
+            'status': 'ok',
+            'articles': [{'title': 'Cached Headline', 'source': {'name': 'Test Source'}}]
+        }
+        
+        first = asyncio.run(self.api.get_top_headlines('us', 'business'))
+        second = asyncio.run(self.api.get_top_headlines('us', 'business'))
+        
+        self.assertEqual(first, second)
+        self.assertEqual(second[0]['title'], 'Cached Headline')
+        mock_get_json.assert_called_once()
     
-    @patch.object(NewsAgentAPI, 'get_top_headlines')
-    def test_get_headlines_route(self, mock_get_headlines):
-        """Test the headlines endpoint"""
-        # Mock the headlines response
-        mock_get_headlines.return_value = [
+    @patch.object(NewsAgentAPI, '_get_json')
+    def test_stale_headlines_refreshed_in_background(self, mock_get_json):
+        """Test that headlines near expiry are served while being refetched"""
+        mock_get_json.return_value = {'status': 'ok', 'articles': [{'title': 'Fresh Headline'}]}
+        key = 'v1:news:headlines:us:business:all'
+        self.api.local_cache[key] = {
+            'timestamp': time.time() - 290,
+            'ttl': 300,
+            'data': [{'title': 'Stale Headline'}]
+        }
+        
+        async def fetch_twice():
+            first = await self.api.get_top_headlines('us', 'business')
+            await asyncio.gather(*self.api._refreshing.values())
+            second = await self.api.get_top_headlines('us', 'business')
+            return first, second
+        
+        first, second = asyncio.run(fetch_twice())
+        
+        self.assertEqual(first[0]['title'], 'Stale Headline')
+        self.assertEqual(second[0]['title'], 'Fresh Headline')
+        mock_get_json.assert_called_once()
+    
+    @patch.object(NewsAgentAPI, '_get_json')
+    def test_fallback_headlines_not_cached(self, mock_get_json):
+        """Test that mock headlines served while every source fails aren't cached"""
+        mock_get_json.side_effect = Exception("NewsAPI unavailable")
+        stale_key = 'v1:news:headlines:us:business:all'
+        self.api.local_cache[stale_key] = {
+            'timestamp': time.time() - 290,
+            'ttl': 300,
+            'data': [{'title': 'Stale Headline'}]
+        }
+        
+        async def fetch():
+            fallback = await self.api.get_top_headlines('us', 'science')
+            first = await self.api.get_top_headlines('us', 'business')
+            await asyncio.gather(*self.api._refreshing.values())
+            second = await self.api.get_top_headlines('us', 'business')
+            return fallback, first, second
+        
+        fallback, first, second = asyncio.run(fetch())
+        
+        self.assertEqual(fallback[0]['title'], 'Breaking News: Technology Advances')
+        self.assertNotIn('v1:news:headlines:us:science:all', self.api.local_cache)
+        self.assertEqual(first[0]['title'], 'Stale Headline')
+        self.assertEqual(second[0]['title'], 'Stale Headline')
+    
+    @patch.object(NewsAgentAPI, '_get_json')
+    def test_fallback_topic_articles_not_cached(self, mock_get_json):
+        """Test that mock topic articles served while every source fails aren't cached"""
+        mock_get_json.side_effect = Exception("NewsAPI unavailable")
+        
+        articles = asyncio.run(self.api.get_news_by_topic('elections'))
+        
+        self.assertEqual(articles[0]['title'], 'News about elections')
+        self.assertNotIn('v1:news:topics:elections:en:all', self.api.local_cache)
+    
+    @patch.object(NewsAgentAPI, 'fetch_from_nyt', side_effect=Exception("NYT unavailable"))
+    def test_failed_fetch_releases_refresh_lock(self, mock_fetch_from_nyt):
+        """Test that a failed fetch lets other workers retry the key at once"""
+        async def fetch_from_two_workers():
+            client = fakeredis.aioredis.FakeRedis()
+            with patch('news_agent_python.redis_client', client):
+                first = await self.api.get_from_publication('nyt')
+                lock = await client.get('v1:news:publications:nyt:all:lock')
+                started = time.monotonic()
+                second = await NewsAgentAPI().get_from_publication('nyt')
+                return first, lock, second, time.monotonic() - started
+        
+        first, lock, second, waited = asyncio.run(fetch_from_two_workers())
+        
+        self.assertEqual(first[0]['title'], 'Story from nyt')
+        self.assertIsNone(lock)
+        self.assertEqual(second[0]['title'], 'Story from nyt')
+        self.assertLess(waited, 1)
+        self.assertEqual(mock_fetch_from_nyt.call_count, 2)
+    
+    @patch.object(NewsAgentAPI, '_get_json')
+    def test_concurrent_requests_share_one_fetch(self, mock_get_json):
+        """Test that concurrent requests for the same topic fetch it once"""
+        async def slow_response(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return {'status': 'ok', 'articles': [{'title': 'Shared Article'}]}
+        
+        mock_get_json.side_effect = slow_response
+        
+        async def fetch_concurrently():
+            return await asyncio.gather(*(self.api.get_news_by_topic('climate') for _ in range(5)))
+        
+        results = asyncio.run(fetch_concurrently())
+        
+        self.assertTrue(all(result[0]['title'] == 'Shared Article' for result in results))
+        mock_get_json.assert_called_once()
+    
+    def test_compiled_fields_keep_field_order(self):
+        """Test that articles list their fields in the field map's order"""
+        complete = NEWSAPI_FIELDS(HEADLINES_API_RESPONSE['articles'][0])
+        partial_article = NEWSAPI_FIELDS({'title': 'Only a title'})
+        nested_only = _compile_fields({'name': ('source', 'name'), 'kind': lambda item: 'news'})
+        
+        expected = ['title', 'description', 'url', 'imageUrl', 'source', 'publishedAt', 'content']
+        self.assertEqual(list(complete), expected)
+        self.assertEqual(complete['source'], 'Test Source')
+        self.assertEqual(list(partial_article), expected)
+        self.assertIsNone(partial_article['url'])
+        self.assertEqual(nested_only({'source': {'name': 'Wire'}}), {'name': 'Wire', 'kind': 'news'})
+    
+    @patch('news_agent_python.RETRY_BACKOFF', 0)
+    @patch('news_agent_python.get_http_session')
+    def test_get_json_retries_failed_requests(self, mock_get_http_session):
+        """Test that connection errors, timeouts and gateway errors are retried"""
+        def request(status=200, error=None):
+            response = MagicMock(status=status)
+            response.read = AsyncMock(return_value=b'{"status": "ok"}')
+            context = MagicMock()
+            context.__aenter__.return_value = response
+            context.__aenter__.side_effect = error
+            return context
+        
+        session = MagicMock()
+        mock_get_http_session.return_value = session
+        session.get.side_effect = [
+            request(error=aiohttp.ClientConnectionError()),
+            request(error=asyncio.TimeoutError()),
+            request(status=503),
+            request()
+        ]
+        
+        data = asyncio.run(self.api._get_json('https://example.com/news', params={}))
+        
+        self.assertEqual(data, {'status': 'ok'})
+        self.assertEqual(session.get.call_count, 4)
+    
+    def test_build_articles_context(self):
+        """Test that the analysis context only carries the fields it needs"""
+        articles = [
             {
-                'title': 'Test Headline 1',
-                'description': 'Test Description 1',
-                'url': 'http://test.com/1',
-                'imageUrl': 'http://test.com/image1.jpg',
+                'title': f'Headline {i}',
                 'source': 'Test Source',
-                'publishedAt': '2023-05-01T12:00:00Z',
-                'content': 'Test content 1'
+                'description': 'x' * 1000,
+                'content': 'Full article body'
             }
+            for i in range(8)
         ]
         
-        # Make the request
-        response = self.app.get('/api/headlines?country=us&category=technology')
-        data = json.loads(response.data)
+        context = self.api._build_articles_context(articles)
         
-        # Check the response
-        self.assertEqual(response.status_code, 200)
-        self.assertTrue(data['success'])
-        self.assertEqual(len(data['headlines']), 1)
-        self.assertEqual(data['headlines'][0]['title'], 'Test Headline 1')
-        
-        # Check that the API was called with correct parameters
-        mock_get_headlines.assert_called_once_with('us', 'technology')
+        self.assertEqual(context.count('TITLE: '), 5)
+        self.assertIn('DESCRIPTION: ' + 'x' * 300 + '\n', context)
+        self.assertNotIn('Full article body', context)
     
-    @patch.object(NewsAgentAPI, 'get_from_publication')
-    def test_get_from_publication_route(self, mock_get_from_publication):
-        """Test the publication endpoint"""
-        # Mock the publication response
-        mock_get_from_publication.return_value = [
-            {
-                'title': 'WSJ Article 1',
-                'description': 'WSJ Description 1',
-                'url': 'http://wsj.com/1',
-                'imageUrl': 'http://wsj.com/image1.jpg',
-                'source': 'Wall Street Journal',
-                'publishedAt': '2023-05-01T12:00:00Z'
-            }
+    def test_build_articles_context_skips_repeated_titles(self):
+        """Test that the same story from several sources is only included once"""
+        articles = [
+            {'title': 'Markets Rally', 'source': 'Source A', 'description': 'First'},
+            {'title': 'markets rally!', 'source': 'Source B', 'description': 'Second'},
+            {'title': 'Storm Warning', 'source': 'Source C', 'description': 'Third'}
         ]
         
-        # Make the request
-        response = self.app.get('/api/publication/wsj')
-        data = json.loads(response.data)
+        context = self.api._build_articles_context(articles)
         
-        # Check the response
-        self.assertEqual(response.status_code, 200)
-        self.assertTrue(data['success'])
-        self.assertEqual(len(data['articles']), 1)
-        self.assertEqual(data['articles'][0]['title'], 'WSJ Article 1')
+        self.assertEqual(context.count('TITLE: '), 2)
+        self.assertIn('Source A', context)
+        self.assertNotIn('Source B', context)
+        self.assertIn('Storm Warning', context)
+    
+    @patch('news_agent_python.OPENAI_API_KEY', 'test-key')
+    @patch('news_agent_python.openai_client')
+    def test_conversational_response_trims_history(self, mock_client):
+        """Test that only the most recent history within the token budget is sent"""
+        mock_client.chat.completions.create = AsyncMock()
+        mock_client.chat.completions.create.return_value.choices = [MagicMock()]
+        history = [{'role': 'user', 'content': f'message {i} ' + 'x' * 2000} for i in range(20)]
         
-        # Check that the API was called with correct parameters
-        mock_get_from_publication.assert_called_once_with('wsj')
+        asyncio.run(self.api.generate_conversational_response('Latest news?', history))
+        
+        messages = mock_client.chat.completions.create.call_args.kwargs['messages']
+        self.assertEqual(messages[0]['role'], 'system')
+        self.assertEqual(messages[-1], {'role': 'user', 'content': 'Latest news?'})
+        self.assertLess(len(messages), 22)
+        self.assertTrue(messages[-2]['content'].startswith('message 19 '))
+    
+    def test_map_publication_to_news_api_source(self):
+        """Test mapping publication names to NewsAPI source IDs"""
+        cases = {
+            'Wall Street Journal': 'the-wall-street-journal',
+            'wsj': 'the-wall-street-journal',
+            'bbc': 'bbc-news',
+            'unknown publication': 'unknown publication'
+        }
+        
+        self.assertEqual(
+            {publication: self.api.map_publication_to_news_api_source(publication) for publication in cases},
+            cases
+        )
 
 
 if __name__ == '__main__':
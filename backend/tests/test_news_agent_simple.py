@@ -0,0 +1,54 @@
+"""
+Test cases for the simple News Agent backend
+"""
+
+import unittest
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Import the NYT cache helpers
+from news_agent_simple import cached_fetch, fetch_locks, nyt_cache
+
+
+class TestCachedFetch(unittest.TestCase):
+    """Test cases for the NYT results cache"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        nyt_cache.clear()
+        self.addCleanup(nyt_cache.clear)
+    
+    def test_concurrent_misses_share_one_load(self):
+        """Test that concurrent requests for the same key load it once"""
+        calls = []
+        
+        def slow_load():
+            calls.append(1)
+            time.sleep(0.05)
+            return [{'title': 'Shared Article'}]
+        
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            results = list(pool.map(lambda _: cached_fetch('test:shared', slow_load), range(5)))
+        
+        self.assertTrue(all(result[0]['title'] == 'Shared Article' for result in results))
+        self.assertEqual(len(calls), 1)
+        self.assertNotIn('test:shared', fetch_locks)
+        
+        # Later requests are served from the cache
+        self.assertEqual(cached_fetch('test:shared', slow_load), [{'title': 'Shared Article'}])
+        self.assertEqual(len(calls), 1)
+    
+    def test_failed_load_drops_key_lock(self):
+        """Test that a load that raises caches nothing and leaves no key lock"""
+        def failing_load():
+            raise RuntimeError("NYT unavailable")
+        
+        with self.assertRaises(RuntimeError):
+            cached_fetch('test:failing', failing_load)
+        
+        self.assertNotIn('test:failing', fetch_locks)
+        self.assertNotIn('test:failing', nyt_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file